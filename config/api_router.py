@@ -4,16 +4,16 @@ from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from mentors.mentors.api.views import (
     MentorViewSet,
-    StripeAccountLinkView,
+    stripe_account_link,
     MentorSessionViewSet,
-    CreateStripeCheckoutView,
-    StripeCustomerPortalLinkView,
+    stripe_checkout,
+    stripe_customer_portal_link,
     stripe_webhook,
-    StripeAccountBalance,
-    StripeAccountPayouts,
+    stripe_account_balance,
+    stripe_account_payouts,
     ReviewViewSet
 )
-from mentors.users.api.views import UserViewSet
+from mentors.users.api.views import CacheMetricsView, MailQueueView, StripeMetricsView, UserViewSet
 
 if settings.DEBUG:
     router = DefaultRouter()
@@ -29,10 +29,13 @@ router.register("reviews", ReviewViewSet)
 app_name = "api"
 urlpatterns = router.urls
 urlpatterns += [
-    path("stripe-connect/", StripeAccountLinkView.as_view()),
-    path("stripe-checkout/", CreateStripeCheckoutView.as_view()),
-    path("stripe-customer-portal/", StripeCustomerPortalLinkView.as_view()),
-    path("stripe-account-balance/", StripeAccountBalance.as_view()),
-    path("stripe-account-payouts/", StripeAccountPayouts.as_view()),
-    path("stripe-webhook/", stripe_webhook)
+    path("stripe-connect/", stripe_account_link),
+    path("stripe-checkout/", stripe_checkout),
+    path("stripe-customer-portal/", stripe_customer_portal_link),
+    path("stripe-account-balance/", stripe_account_balance),
+    path("stripe-account-payouts/", stripe_account_payouts),
+    path("stripe-webhook/", stripe_webhook),
+    path("mail-queue/", MailQueueView.as_view()),
+    path("stripe-metrics/", StripeMetricsView.as_view()),
+    path("cache-metrics/", CacheMetricsView.as_view()),
 ]
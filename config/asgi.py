@@ -0,0 +1,32 @@
+"""
+ASGI config for mentors project.
+
+Serves the async views, the Stripe proxy endpoints, so a few workers can keep many Stripe calls
+in flight, and the live session streams, which wait on Redis in the event loop instead of
+holding a thread each. production.yml runs it as the django-asgi service, under gunicorn with
+uvicorn workers, and traefik routes those endpoints to it. Everything else stays on the WSGI
+service.
+"""
+import os
+import sys
+from pathlib import Path
+
+import django
+
+# This allows easy placement of apps within the interior
+# mentors directory.
+ROOT_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(ROOT_DIR / "mentors"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+django.setup(set_prefix=False)
+
+# Imported once the apps are loaded
+from mentors.utils import stripe_client  # noqa E402
+from mentors.utils.asgi import AsyncStreamingASGIHandler  # noqa E402
+
+application = AsyncStreamingASGIHandler()
+
+# The worker's loop lives as long as the process, so the async Stripe calls can keep their
+# connections open
+stripe_client.share_async_sessions()
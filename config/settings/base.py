@@ -43,6 +43,12 @@ LOCALE_PATHS = [str(ROOT_DIR / "locale")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Optional read replica for the views using mentors.utils.replica.ReplicaReadMixin
+if env("DATABASE_REPLICA_URL", default=None):
+    DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
+    DATABASE_ROUTERS = ["mentors.utils.replica.ReplicaRouter"]
+# Seconds a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=10)
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -141,6 +147,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "mentors.utils.replica.PinWritersToPrimaryMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -282,8 +289,25 @@ CELERY_TASK_TIME_LIMIT = 5 * 60
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#task-soft-time-limit
 # TODO: set to whatever value is adequate in your circumstances
 CELERY_TASK_SOFT_TIME_LIMIT = 60
+# https://docs.celeryproject.org/en/stable/userguide/configuration.html#task-routes
+# Mail gets its own queue so a slow provider can't hold up the other tasks
+CELERY_TASK_ROUTES = {
+    "mentors.users.tasks.send_mail_batch": {"queue": "mail"},
+}
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#beat-scheduler
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# https://docs.celeryproject.org/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "reroll-mentor-random-keys": {
+        "task": "mentors.mentors.tasks.reroll_mentor_random_keys",
+        "schedule": 60 * 60,
+    },
+    # The webhook schedules a drain for every burst of events, this catches anything left over
+    "process-stripe-webhook-events": {
+        "task": "mentors.mentors.tasks.process_stripe_webhook_events",
+        "schedule": 60,
+    },
+}
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -330,6 +354,8 @@ CORS_URLS_REGEX = r"^/api/.*$"
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
 ]
+# Sent with 409s while a user's Stripe account is being provisioned
+CORS_EXPOSE_HEADERS = ["Retry-After"]
 
 # By Default swagger ui is available only to admin user. You can change permission classs to change that
 # See more configuration options at https://drf-spectacular.readthedocs.io/en/latest/settings.html#settings
@@ -348,3 +374,15 @@ SPECTACULAR_SETTINGS = {
 STRIPE_PUBLIC_KEY = env("STRIPE_PUBLIC_KEY")
 STRIPE_SECRET_KEY = env("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = env("STRIPE_WEBHOOK_SECRET")
+# Point at a local stub (python manage.py stripe_stub) to work offline
+STRIPE_API_BASE = env("STRIPE_API_BASE", default="https://api.stripe.com")
+# Pub/sub for live session updates, see mentors.mentors.live
+REDIS_URL = env("REDIS_URL", default=CELERY_BROKER_URL)
+# See mentors.utils.stripe_client
+STRIPE_CONNECT_TIMEOUT = env.float("STRIPE_CONNECT_TIMEOUT", default=3)  # seconds
+STRIPE_READ_TIMEOUT = env.float("STRIPE_READ_TIMEOUT", default=20)
+STRIPE_POOL_SIZE = env.int("STRIPE_POOL_SIZE", default=10)  # keep-alive connections per process
+STRIPE_MAX_NETWORK_RETRIES = env.int("STRIPE_MAX_NETWORK_RETRIES", default=1)
+# Consecutive failures before Stripe calls fail fast, and for how many seconds
+STRIPE_CIRCUIT_FAILURE_THRESHOLD = env.int("STRIPE_CIRCUIT_FAILURE_THRESHOLD", default=5)
+STRIPE_CIRCUIT_RESET_TIMEOUT = env.int("STRIPE_CIRCUIT_RESET_TIMEOUT", default=30)
@@ -25,5 +25,18 @@ PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
+# DATABASES
+# ------------------------------------------------------------------------------
+# A second connection to the test database, for testing the read replica router. Tests that
+# use it install the router with settings.DATABASE_ROUTERS.
+DATABASES["replica"] = {**DATABASES["default"], "ATOMIC_REQUESTS": False, "TEST": {"MIRROR": "default"}}  # noqa F405
+
+# Celery
+# ------------------------------------------------------------------------------
+# Tasks queued from transaction.on_commit run in place, there is no broker in tests
+CELERY_TASK_ALWAYS_EAGER = True
+
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Tests talk to the local Stripe stub, a failure should surface rather than be retried
+STRIPE_MAX_NETWORK_RETRIES = 0
@@ -1,5 +1,5 @@
 import {useRouter} from 'next/router';
-import React, {useContext} from "react";
+import React, {useContext, useState} from "react";
 import {AuthContext} from "../../../contexts/AuthContext";
 import {API_URL} from "../../../config";
 import {DashboardLayout} from "../../../components/DashboardLayout";
@@ -18,7 +18,20 @@ function MentorSessionHistory() {
       }
     }).then((res) => res.json());
   }
-  const {data: sessions} = useSWR(`${API_URL}/api/sessions/mentor_session_history/`, fetcher)
+  const {data: sessionPage} = useSWR(`${API_URL}/api/sessions/mentor_session_history/`, fetcher)
+  // The history is cursor paginated, older pages are appended as they are loaded
+  const [olderPages, setOlderPages] = useState([])
+  const [loadingMore, setLoadingMore] = useState(false)
+  const pages = [sessionPage, ...olderPages]
+  const sessions = pages.flatMap((page) => page.results)
+  const next = pages[pages.length - 1].next
+
+  function loadMore() {
+    setLoadingMore(true)
+    fetcher(next)
+      .then((page) => setOlderPages([...olderPages, page]))
+      .finally(() => setLoadingMore(false))
+  }
 
   if (typeof window !== 'undefined' && !user && !loading)
     router.push('/login');
@@ -91,6 +104,18 @@ function MentorSessionHistory() {
                 </tbody>
               </table>
             </div>
+            {next && (
+              <div className="pt-5 flex justify-center">
+                <button
+                  type="button"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="inline-flex justify-center py-2 px-4 border border-gray-300 shadow-sm text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 disabled:opacity-50"
+                >
+                  {loadingMore ? "Loading..." : "Load more"}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </div>
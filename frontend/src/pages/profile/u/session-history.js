@@ -1,6 +1,6 @@
 import {useRouter} from 'next/router';
 import Link from "next/link";
-import React, {useContext} from "react";
+import React, {useContext, useState} from "react";
 import useSWR, {SWRConfig} from "swr";
 import {AuthContext} from "../../../contexts/AuthContext";
 import {API_URL} from "../../../config";
@@ -19,7 +19,20 @@ function ClientSessionHistory() {
       }
     }).then((res) => res.json());
   }
-  const {data: sessions} = useSWR(`${API_URL}/api/sessions/client_session_history/`, fetcher)
+  const {data: sessionPage} = useSWR(`${API_URL}/api/sessions/client_session_history/`, fetcher)
+  // The history is cursor paginated, older pages are appended as they are loaded
+  const [olderPages, setOlderPages] = useState([])
+  const [loadingMore, setLoadingMore] = useState(false)
+  const pages = [sessionPage, ...olderPages]
+  const sessions = pages.flatMap((page) => page.results)
+  const next = pages[pages.length - 1].next
+
+  function loadMore() {
+    setLoadingMore(true)
+    fetcher(next)
+      .then((page) => setOlderPages([...olderPages, page]))
+      .finally(() => setLoadingMore(false))
+  }
 
   function formatPrice(price) {
     return price / 100
@@ -110,6 +123,18 @@ function ClientSessionHistory() {
                 </tbody>
               </table>
             </div>
+            {next && (
+              <div className="pt-5 flex justify-center">
+                <button
+                  type="button"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="inline-flex justify-center py-2 px-4 border border-gray-300 shadow-sm text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 disabled:opacity-50"
+                >
+                  {loadingMore ? "Loading..." : "Load more"}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -2,7 +2,6 @@ import {useRouter} from 'next/router';
 import React, {useContext, useEffect, useState} from "react";
 import Link from "next/link";
 import useSWR, {SWRConfig, useSWRConfig} from "swr";
-import io from "socket.io-client";
 import {PauseIcon, PlayIcon, StopIcon} from "@heroicons/react/solid";
 import {ViewListIcon} from '@heroicons/react/outline'
 import {MentorProfileHeader} from "../../components/MentorProfileHeader";
@@ -10,8 +9,7 @@ import {ClientChatbox} from "../../containers/ClientChatbox";
 import {API_URL} from "../../config";
 import {AuthContext} from "../../contexts/AuthContext";
 import {classNames} from "../../utils/classNames";
-
-let socket
+import {subscribeToSession} from "../../utils/sessionEvents";
 
 const callProviders = [
   {
@@ -101,32 +99,20 @@ const NewSession = React.memo(({mentorSession}) => {
   }, [mentorSession])
 
   useEffect(() => {
-    async function initialiseSocket() {
-      await fetch(`/api/socket/${mentorSession.id}`);
-      socket = io()
-      socket.on("update-pause-session", (msg) => {
-        if (msg.action === 'pause') {
-          setTimerOn(false)
-        } else {
-          setTimerOn(true)
-        }
-      })
-      socket.on("update-end-session", async () => {
+    // The server pushes every start, pause, resume and end to both participants
+    return subscribeToSession(mentorSession.id, accessToken, async (event, state) => {
+      let length = state.billed_seconds
+      if (state.segment_started_at) {
+        length += Math.floor((Date.now() - Date.parse(state.segment_started_at)) / 1000)
+      }
+      setTime(length)
+      setTimerOn(Boolean(state.segment_started_at))
+      if (event === "ended") {
+        setSessionEnded(true)
         await mutate(`${API_URL}/api/sessions/${mentorSession.id}/`)
-        setTimerOn(false)
-      })
-    }
-
-    if (mentorSession) {
-      initialiseSocket()
-    }
-    return () => {
-      if (socket) {
-        socket.emit('user-disconnect', {user});
-        socket.off();
       }
-    }
-  }, [])
+    })
+  }, [mentorSession.id, accessToken])
 
   async function startOrPauseSession() {
     try {
@@ -145,7 +131,6 @@ const NewSession = React.memo(({mentorSession}) => {
         } else {
           setTimerOn(true)
         }
-        socket.emit('pause-session', {action: timerOn ? "pause" : "start"});
       }
     } catch (err) {
       console.error(err)
@@ -166,7 +151,6 @@ const NewSession = React.memo(({mentorSession}) => {
         const data = await apiRes.json();
         setTimerOn(false)
         setSessionEnded(true)
-        socket.emit('end-session');
         await mutate(`${API_URL}/api/sessions/${mentorSession.id}/`, data)
       }
     } catch (err) {
@@ -24,6 +24,10 @@ const StripeConnect = ({ accessToken  }) => {
           if (apiRes.status === 200) {
             const data = await apiRes.json();
             window.location.href = data.url
+          } else if (apiRes.status === 409) {
+            // The Stripe account is still being created, try again when the API says to
+            const retryAfter = parseInt(apiRes.headers.get("Retry-After") || "5")
+            setTimeout(fetchStripeAccountLink, retryAfter * 1000)
           }
         } catch (err) {
           console.error(err)
@@ -0,0 +1,82 @@
+import {API_URL} from "../config";
+
+// Reads the session's live stream (Server-Sent Events) and calls onEvent(event, data) for each
+// event. EventSource can't send the Authorization header, so the stream is read with fetch.
+// Reconnects when the server closes the stream, until the session ends. Returns a function
+// that closes the stream.
+export function subscribeToSession(sessionId, accessToken, onEvent) {
+  const controller = new AbortController()
+  let retry = 1000
+
+  // Returns true once the session has ended and there is nothing more to listen for
+  function handleFrame(frame) {
+    let event = "message"
+    let data = ""
+    for (const line of frame.split("\n")) {
+      if (line.startsWith("event: ")) {
+        event = line.slice(7)
+      } else if (line.startsWith("data: ")) {
+        data += line.slice(6)
+      } else if (line.startsWith("retry: ")) {
+        retry = parseInt(line.slice(7), 10)
+      }
+    }
+    if (!data) {
+      return false
+    }
+    const state = JSON.parse(data)
+    onEvent(event, state)
+    return state.completed
+  }
+
+  async function read() {
+    const res = await fetch(`${API_URL}/api/sessions/${sessionId}/live/`, {
+      headers: {
+        Accept: "text/event-stream",
+        Authorization: `Bearer ${accessToken}`,
+      },
+      signal: controller.signal,
+    })
+    if (!res.ok) {
+      return false
+    }
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ""
+    while (true) {
+      const {value, done} = await reader.read()
+      if (done) {
+        return true
+      }
+      buffer += decoder.decode(value, {stream: true})
+      const frames = buffer.split("\n\n")
+      buffer = frames.pop()
+      for (const frame of frames) {
+        if (handleFrame(frame)) {
+          return false
+        }
+      }
+    }
+  }
+
+  async function listen() {
+    while (!controller.signal.aborted) {
+      let reconnect = true
+      try {
+        reconnect = await read()
+      } catch (err) {
+        if (controller.signal.aborted) {
+          return
+        }
+        console.error(err)
+      }
+      if (!reconnect) {
+        return
+      }
+      await new Promise(resolve => setTimeout(resolve, retry))
+    }
+  }
+
+  listen()
+  return () => controller.abort()
+}
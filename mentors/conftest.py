@@ -1,7 +1,12 @@
 import pytest
+import stripe
+from django.core.cache import cache
 
 from mentors.users.models import User
+from mentors.users.profiles import profiles
 from mentors.users.tests.factories import UserFactory
+from mentors.utils.stripe_client import build_http_client
+from mentors.utils.stripe_stub import StripeStub
 
 
 @pytest.fixture(autouse=True)
@@ -9,6 +14,31 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached entries would outlive the rows each test rolls back
+    cache.clear()
+    profiles.evict()
+
+
+@pytest.fixture(scope="session")
+def stripe_stub_server():
+    server = StripeStub().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def stripe_stub(stripe_stub_server, monkeypatch) -> StripeStub:
+    # Keep the test suite offline, every Stripe call goes to the local stub. Each test gets its
+    # own client so circuit breaker state and latency metrics don't leak between tests.
+    stripe_stub_server.reset()
+    monkeypatch.setattr(stripe, "api_base", stripe_stub_server.url)
+    monkeypatch.setattr(stripe, "default_http_client", build_http_client())
+    return stripe_stub_server
+
+
 @pytest.fixture
 def user() -> User:
     return UserFactory()
@@ -1,11 +1,20 @@
 from django.contrib import admin
-from .models import Mentor, MentorSession, MentorSessionEvent, Review
+from .models import Mentor, MentorSession, MentorSessionEvent, MentorStats, Review, StripeWebhookEvent
 
 
 class MentorAdmin(admin.ModelAdmin):
     list_display = ["user", "is_active", "approved", "rate"]
 
 
+class MentorStatsAdmin(admin.ModelAdmin):
+    list_display = ["mentor", "completed_sessions", "rating_count", "billed_seconds", "paid_cents"]
+
+
+class StripeWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "type", "received_at", "processed_at"]
+    list_filter = ["type"]
+
+
 class MentorSessionEventInLineAdmin(admin.TabularInline):
     model = MentorSessionEvent
     extra = 0
@@ -19,3 +28,5 @@ admin.site.register(Review)
 admin.site.register(Mentor, MentorAdmin)
 admin.site.register(MentorSession, MentorSessionAdmin)
 admin.site.register(MentorSessionEvent)
+admin.site.register(MentorStats, MentorStatsAdmin)
+admin.site.register(StripeWebhookEvent, StripeWebhookEventAdmin)
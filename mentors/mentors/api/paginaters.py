@@ -1,4 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+import random
+
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 
 
 class LargeResultsSetPagination(PageNumberPagination):
@@ -17,3 +19,137 @@ class SmallResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class SeededShuffle:
+    """
+    A queryset ordered by its indexed random_key, rotated so it starts at the seed.
+
+    Rows from seed to 1 are followed by rows from 0 to seed, and each slice is read
+    with an index range scan on (random_key, id) instead of sorting the table.
+    """
+    ordered = True
+
+    def __init__(self, queryset, seed):
+        queryset = queryset.order_by("random_key", "id")
+        self.head = queryset.filter(random_key__gte=seed)
+        self.tail = queryset.filter(random_key__lt=seed)
+        self._head_count = None
+
+    @property
+    def head_count(self):
+        if self._head_count is None:
+            self._head_count = self.head.count()
+        return self._head_count
+
+    def count(self):
+        return self.head_count + self.tail.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        rows = list(self.head[start:stop]) if start < self.head_count else []
+        if stop > self.head_count:
+            rows += list(self.tail[max(start - self.head_count, 0):stop - self.head_count])
+        return rows
+
+
+class SeededShufflePagination(SmallResultsSetPagination):
+    """
+    Pages through a shuffled listing. Each client gets its own permutation, so the
+    first and later pages never overlap. Pass ``seed`` (0 <= seed < 1) to choose one
+    explicitly, the page links keep it.
+    """
+    seed_query_param = 'seed'
+
+    def get_seed(self, request):
+        try:
+            seed = float(request.query_params[self.seed_query_param])
+        except (KeyError, ValueError):
+            return random.Random(request.user.pk).random()
+        return seed if 0 <= seed < 1 else 0.0
+
+    def paginate_queryset(self, queryset, request, view=None):
+        shuffled = SeededShuffle(queryset, self.get_seed(request))
+        return super().paginate_queryset(shuffled, request, view)
+
+
+class MentorCursorPagination(CursorPagination):
+    """
+    Keyed on id rather than random_key, which reroll_mentor_random_keys rewrites every hour
+    and would make clients paging across a reroll see mentors twice or not at all.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ("id",)
+
+
+class ReviewCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ("-timestamp", "-id")
+
+
+class MentorSessionCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ("-start_time", "-id")
+
+
+class CursorOptInPagination(BasePagination):
+    """
+    Keyset pagination for clients that send ``?cursor=`` (empty for the first page),
+    so deep pages cost the same as the first one. Other clients keep getting
+    ``page_pagination_class``, or an unpaginated list when it is None.
+    """
+    cursor_pagination_class = None
+    page_pagination_class = None
+
+    def __init__(self):
+        self.paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_pagination_class()
+        elif self.page_pagination_class is not None:
+            self.paginator = self.page_pagination_class()
+        else:
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.cursor_pagination_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = self.cursor_pagination_class().get_schema_operation_parameters(view)
+        if self.page_pagination_class is not None:
+            parameters += self.page_pagination_class().get_schema_operation_parameters(view)
+        return parameters
+
+    @property
+    def display_page_controls(self):
+        return self.paginator is not None and self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class MentorPagination(CursorOptInPagination):
+    cursor_pagination_class = MentorCursorPagination
+    page_pagination_class = SeededShufflePagination
+
+
+class ReviewPagination(CursorOptInPagination):
+    cursor_pagination_class = ReviewCursorPagination
+
+
+class MentorSessionPagination(CursorOptInPagination):
+    cursor_pagination_class = MentorSessionCursorPagination
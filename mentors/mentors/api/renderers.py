@@ -0,0 +1,10 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class EventStreamRenderer(JSONRenderer):
+    """
+    Lets views accept text/event-stream requests. Streams are returned as StreamingHttpResponse,
+    so only error responses go through render() and are sent as JSON.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
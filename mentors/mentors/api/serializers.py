@@ -1,16 +1,21 @@
 import datetime
-from math import ceil
+from collections import defaultdict
+from operator import attrgetter
 
 from django.conf import settings
-from django.db.models import Avg
+from django.db.models import Avg, Exists, OuterRef
+from django.utils import timezone
 from django.utils.timezone import make_aware
 from rest_framework import serializers
 
-from mentors.mentors.models import Mentor, MentorSession, MentorSessionEvent, Review
-from mentors.users.api.serializers import UserSerializer
+from mentors.mentors.models import Mentor, MentorSession, MentorSessionEvent, Review, session_price
+from mentors.users.api.serializers import UserSerializer, user_representation, user_values
+from mentors.users.loaders import LoaderListSerializer, LoadRelatedMixin
+from mentors.users.profiles import get_profile
+from mentors.utils.values_serializers import ValuesSerializer, datetime_representation, file_url
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(LoadRelatedMixin, serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
 
     class Meta:
@@ -26,12 +31,18 @@ class ReviewSerializer(serializers.ModelSerializer):
             'id',
             'user'
         )
+        list_serializer_class = LoaderListSerializer
+
+    def load_related(self, loader, instances):
+        mentor_sessions = [review.session for review in instances]
+        loader.attach(mentor_sessions, "client")
+        UserSerializer().load_related(loader, [mentor_session.client for mentor_session in mentor_sessions])
 
     def get_user(self, obj):
         return UserSerializer(obj.session.client, context=self.context).data
 
 
-class MentorSerializer(serializers.ModelSerializer):
+class MentorSerializer(LoadRelatedMixin, serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
     session_count = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
@@ -55,14 +66,26 @@ class MentorSerializer(serializers.ModelSerializer):
             "session_count",
             "average_rating"
         )
+        list_serializer_class = LoaderListSerializer
+
+    def load_related(self, loader, instances):
+        loader.attach(instances, "user")
+        UserSerializer().load_related(loader, [mentor.user for mentor in instances])
 
     def get_user(self, obj):
         return UserSerializer(obj.user, context=self.context).data
 
     def get_session_count(self, obj):
+        # Read the denormalized totals, falling back to a query for mentors without a stats row
+        stats = getattr(obj, "stats", None)
+        if stats is not None:
+            return stats.completed_sessions
         return MentorSession.objects.filter(mentor=obj, completed=True).count()
 
     def get_average_rating(self, obj):
+        stats = getattr(obj, "stats", None)
+        if stats is not None:
+            return stats.average_rating
         return Review.objects.filter(session__mentor=obj).aggregate(rating_avg=Avg("rating"))["rating_avg"]
 
 
@@ -93,7 +116,7 @@ class MentorSessionEventSerializer(serializers.ModelSerializer):
         return session_length_time.seconds
 
 
-class MentorSessionSerializer(serializers.ModelSerializer):
+class MentorSessionSerializer(LoadRelatedMixin, serializers.ModelSerializer):
     events = serializers.SerializerMethodField()
     price = serializers.SerializerMethodField()
     mentor_profile = serializers.SerializerMethodField()
@@ -137,23 +160,21 @@ class MentorSessionSerializer(serializers.ModelSerializer):
             "paid",
             "reviewed"
         )
+        list_serializer_class = LoaderListSerializer
+
+    def load_related(self, loader, instances):
+        # Mentors come with their users, so the clients' users are the only ones left to load
+        loader.attach(instances, "mentor")
+        loader.attach(instances, "client")
+        users = [mentor_session.mentor.user for mentor_session in instances]
+        UserSerializer().load_related(loader, users + [mentor_session.client for mentor_session in instances])
 
     def get_current_session_length(self, obj):
-        current_length = 0
-        for event in obj.events.all():
-            if event.end_time:
-                current_length += event.session_length
-            else:
-                # calculate time between now and session start time
-                end_time = make_aware(datetime.datetime.now())
-                start_time = event.start_time
-                session_length_time = end_time - start_time
-                current_length += session_length_time.seconds
-        return current_length
+        return obj.current_session_length
 
     def get_other_user(self, obj):
         me = self.context["request"].user
-        if me.id == obj.client.id:
+        if me.id == obj.client_id:
             # Then I am the client so the other user is the mentor
             other = obj.mentor.user
         else:
@@ -161,30 +182,27 @@ class MentorSessionSerializer(serializers.ModelSerializer):
         return UserSerializer(other, context=self.context).data
 
     def get_events(self, obj):
-        events = obj.events.order_by("start_time")
-        data = MentorSessionEventSerializer(events, many=True).data
-        return data
+        # Sorted in Python so the events prefetched by the viewset are used as they are
+        events = sorted(obj.events.all(), key=attrgetter("start_time"))
+        return MentorSessionEventSerializer(events, many=True).data
 
     def get_price(self, obj):
-        if not obj.session_length:
-            return None
-        minutes = obj.session_length / 60  # seconds
-        segments = ceil(minutes / 15)
-        price = segments * obj.mentor.rate
-        return price
+        return obj.price
 
     def get_mentor_profile(self, obj):
+        profile = get_profile(obj.mentor.user_id, lambda: obj.mentor.user)
         return {
             "profile_picture": "",
-            "username": obj.mentor.user.username,
-            "full_name": obj.mentor.user.get_full_name()
+            "username": profile["username"],
+            "full_name": profile["full_name"]
         }
 
     def get_client_profile(self, obj):
+        profile = get_profile(obj.client_id, lambda: obj.client)
         return {
             "profile_picture": "",
-            "username": obj.client.username,
-            "full_name": obj.client.get_full_name()
+            "username": profile["username"],
+            "full_name": profile["full_name"]
         }
 
     def get_session_url(self, obj):
@@ -195,8 +213,130 @@ class MentorSessionSerializer(serializers.ModelSerializer):
         return domain + "/sessions/" + str(obj.id)
 
     def get_reviewed(self, obj):
-        try:
-            Review.objects.get(session=obj)
-            return True
-        except Review.DoesNotExist:
-            return False
+        # MentorSessionViewSet annotates this with an EXISTS subquery
+        if hasattr(obj, "reviewed"):
+            return obj.reviewed
+        return Review.objects.filter(session=obj).exists()
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """ReviewSerializer for lists."""
+    # timestamp is the cursor pagination's ordering
+    values = ["id", "timestamp", "session_id", "description", "rating", *user_values("session__client__")]
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "session": row["session_id"],
+            "description": row["description"],
+            "rating": row["rating"],
+            "user": user_representation(row, self.context, "session__client__"),
+        }
+
+
+class MentorValuesSerializer(ValuesSerializer):
+    """MentorSerializer for lists."""
+    # random_key is the cursor pagination's ordering
+    values = [
+        "id", "random_key", "is_active", "title", "bio", "profile_picture", "rate", "approved",
+        "stats__completed_sessions", "stats__rating_sum", "stats__rating_count",
+        # The rest of user_values("user__", mentor_prefix=""), the mentor's own columns are above
+        "user__id", "user__username", "user__first_name", "user__last_name",
+    ]
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "user": user_representation(row, self.context, "user__", mentor_prefix=""),
+            "is_active": row["is_active"],
+            "title": row["title"],
+            "bio": row["bio"],
+            "profile_picture": file_url(row["profile_picture"], Mentor.profile_picture.field, self.context),
+            "rate": row["rate"],
+            "session_count": self.get_session_count(row),
+            "average_rating": self.get_average_rating(row),
+        }
+
+    def get_session_count(self, row):
+        # As in MentorSerializer, mentors without a stats row are counted with a query
+        if row["stats__completed_sessions"] is not None:
+            return row["stats__completed_sessions"]
+        return MentorSession.objects.filter(mentor=row["id"], completed=True).count()
+
+    def get_average_rating(self, row):
+        if row["stats__rating_count"] is not None:
+            # MentorStats.average_rating
+            return row["stats__rating_sum"] / row["stats__rating_count"] if row["stats__rating_count"] else None
+        return Review.objects.filter(session__mentor=row["id"]).aggregate(rating_avg=Avg("rating"))["rating_avg"]
+
+
+class MentorSessionValuesSerializer(ValuesSerializer):
+    """MentorSessionSerializer for lists."""
+    values = [
+        "id", "mentor_id", "client_id", "start_time", "end_time", "session_length", "completed", "paid",
+        "billed_seconds", "segment_started_at", "session_price", "reviewed",
+        *user_values("mentor__user__", mentor_prefix="mentor__"), *user_values("client__"),
+    ]
+
+    @classmethod
+    def project(cls, queryset):
+        return queryset.prefetch_related(None).annotate(
+            session_price=session_price(),
+            reviewed=Exists(Review.objects.filter(session=OuterRef("pk")))
+        ).values(*cls.values)
+
+    def prepare(self, rows):
+        events = MentorSessionEvent.objects.filter(
+            mentor_session__in=[row["id"] for row in rows]
+        ).order_by("start_time").values("id", "mentor_session_id", "start_time", "end_time", "session_length")
+        self.events = defaultdict(list)
+        for event in events:
+            self.events[event["mentor_session_id"]].append(event)
+
+    def to_representation(self, row):
+        me = self.context["request"].user
+        domain = "http://localhost:3000" if settings.DEBUG else "https://domain.com"
+        mentor_user = user_representation(row, self.context, "mentor__user__", mentor_prefix="mentor__")
+        client = user_representation(row, self.context, "client__")
+        current_session_length = row["billed_seconds"]
+        if row["segment_started_at"]:
+            current_session_length += (timezone.now() - row["segment_started_at"]).seconds
+        return {
+            "id": str(row["id"]),
+            "mentor": row["mentor_id"],
+            "client": row["client_id"],
+            "start_time": datetime_representation(row["start_time"]),
+            "end_time": datetime_representation(row["end_time"]),
+            "session_length": row["session_length"],
+            "completed": row["completed"],
+            "events": [self.event_representation(event) for event in self.events[row["id"]]],
+            # MentorSession.price
+            "price": row["session_price"] if row["session_length"] else None,
+            "mentor_profile": {
+                "profile_picture": "",
+                "username": mentor_user["username"],
+                "full_name": mentor_user["name"]
+            },
+            "client_profile": {
+                "profile_picture": "",
+                "username": client["username"],
+                "full_name": client["name"]
+            },
+            "session_url": domain + "/sessions/" + str(row["id"]),
+            "other_user": mentor_user if me.id == row["client_id"] else client,
+            "current_session_length": current_session_length,
+            "paid": row["paid"],
+            "reviewed": row["reviewed"],
+        }
+
+    @staticmethod
+    def event_representation(event):
+        end_time = event["end_time"] or make_aware(datetime.datetime.now())
+        return {
+            "id": str(event["id"]),
+            "start_time": datetime_representation(event["start_time"]),
+            "end_time": datetime_representation(event["end_time"]),
+            "session_length": event["session_length"],
+            # MentorSessionEventSerializer.get_current_session_length
+            "current_session_length": (end_time - event["start_time"]).seconds,
+        }
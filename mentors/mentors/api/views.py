@@ -1,46 +1,113 @@
+import csv
 import datetime
-from math import ceil
+import json
+from itertools import chain, islice
 
 import stripe
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.db.models import Q
-from django.http import HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Q, prefetch_related_objects
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.utils.timezone import make_aware
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import action
-from rest_framework import permissions, status
+from rest_framework import status
 from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin, CreateModelMixin
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 from stripe.error import SignatureVerificationError
 
-from mentors.mentors.models import Mentor, MentorSession, MentorSessionEvent, Review
-from .paginaters import SmallResultsSetPagination
+from mentors.mentors import live
+from mentors.mentors.models import (
+    Mentor,
+    MentorSession,
+    MentorSessionEvent,
+    MentorStats,
+    Review,
+    StripeWebhookEvent,
+    billed_segments,
+    session_price,
+)
+from mentors.mentors.signals import MENTOR_RESPONSES, invalidate_mentor_responses
+from mentors.mentors.stripe_cache import aget_account_data
+from mentors.mentors.tasks import schedule_webhook_drain
+from mentors.users.tasks import provision_stripe
+from mentors.utils import stripe_client
+from mentors.utils.async_api import async_api_view
+from mentors.utils.mail import queue_mail
+from mentors.utils.replica import ReplicaReadMixin
+from mentors.utils.response_cache import CachedResponseMixin
+from mentors.utils.transactions import AtomicWritesMixin
+from mentors.utils.values_serializers import ValuesListMixin
+from .paginaters import (
+    MentorCursorPagination,
+    MentorPagination,
+    MentorSessionCursorPagination,
+    MentorSessionPagination,
+    ReviewPagination,
+    SeededShufflePagination,
+)
 from .permissions import IsSessionClientOrReadOnly, OnlyClientCanReview
-from .serializers import MentorSerializer, MentorSessionSerializer, ReviewSerializer
+from .renderers import EventStreamRenderer
+from .serializers import (
+    MentorSerializer,
+    MentorSessionSerializer,
+    MentorSessionValuesSerializer,
+    MentorValuesSerializer,
+    ReviewSerializer,
+    ReviewValuesSerializer,
+)
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
 User = get_user_model()
 
+EARNINGS_EXPORT_COLUMNS = (
+    "session_id", "start_time", "end_time", "session_length", "billed_segments", "rate", "price", "paid", "rating"
+)
 
-class MentorViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, GenericViewSet):
+
+class Echo:
+    """A file-like object for csv.writer that hands each row back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+class MentorViewSet(
+    AtomicWritesMixin,
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
+    RetrieveModelMixin,
+    ListModelMixin,
+    UpdateModelMixin,
+    GenericViewSet,
+):
     serializer_class = MentorSerializer
-    pagination_class = SmallResultsSetPagination
+    values_serializer_class = MentorValuesSerializer
+    pagination_class = MentorPagination
     queryset = Mentor.objects.filter(is_active=True, approved=True)
     lookup_field = "user__username"
+    response_cache_namespace = MENTOR_RESPONSES
+
+    def get_response_cache_variant(self, request):
+        # Without a seed or a cursor the listing is shuffled per user
+        params = request.query_params
+        if self.action == "list" and not (
+            SeededShufflePagination.seed_query_param in params or MentorCursorPagination.cursor_query_param in params
+        ):
+            return request.user.pk
+        return ""
 
     def get_queryset(self):
-        page = self.request.query_params.get('page')
-        queryset = self.queryset
-        if not page:
-            # Randomize order of list views
-            queryset = self.queryset.order_by("?")
-        return queryset
+        # List views are shuffled per client by the paginator
+        return self.queryset.select_related("user", "stats")
 
     def get_serializer_context(self):
         return {"request": self.request}
@@ -55,19 +122,31 @@ class MentorViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, Generi
         return Response(status=status.HTTP_200_OK, data=serializer.data)
 
 
-class ReviewViewSet(RetrieveModelMixin, ListModelMixin, CreateModelMixin, GenericViewSet):
+class ReviewViewSet(
+    AtomicWritesMixin,
+    ReplicaReadMixin,
+    ValuesListMixin,
+    RetrieveModelMixin,
+    ListModelMixin,
+    CreateModelMixin,
+    GenericViewSet,
+):
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
+    replica_actions = ("list", "retrieve")
+    pagination_class = ReviewPagination
     permission_classes = [IsAuthenticated, IsSessionClientOrReadOnly, OnlyClientCanReview]
-    queryset = Review.objects.all().order_by("-timestamp")
+    queryset = Review.objects.select_related("session").order_by("-timestamp")
 
     def get_serializer_context(self):
         return {"request": self.request}
 
     def perform_create(self, serializer):
         review = serializer.save()
-        send_mail(
+        MentorStats.record_review(review)
+        queue_mail(
             subject="You received a review!",
-            message=f"Your review from {review.session.client.user.name} was {review.rating}/5 stars and they had this to "
+            message=f"Your review from {review.session.client.name} was {review.rating}/5 stars and they had this to "
                     f"say about you: {review.description}",
             from_email="you@local.test",
             recipient_list=[review.session.mentor.user.email]
@@ -84,122 +163,274 @@ class ReviewViewSet(RetrieveModelMixin, ListModelMixin, CreateModelMixin, Generi
         return queryset
 
 
-class MentorSessionViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, CreateModelMixin, GenericViewSet):
+class MentorSessionViewSet(
+    AtomicWritesMixin,
+    ValuesListMixin,
+    RetrieveModelMixin,
+    ListModelMixin,
+    UpdateModelMixin,
+    CreateModelMixin,
+    GenericViewSet,
+):
     serializer_class = MentorSessionSerializer
+    values_serializer_class = MentorSessionValuesSerializer
+    values_actions = ("list", "client_session_history", "mentor_session_history")
+    pagination_class = MentorSessionPagination
     queryset = MentorSession.objects.none()
     lookup_field = "id"
 
     def get_queryset(self):
-        return MentorSession.objects.filter(
+        return self.with_serializer_data(MentorSession.objects.filter(
             Q(mentor=self.request.user.mentor) | Q(client=self.request.user)
+        ))
+
+    @staticmethod
+    def with_serializer_data(queryset):
+        """
+        Loads everything MentorSessionSerializer reads in a constant number of queries. Mentors
+        and users are loaded by the serializer, once per request.
+        """
+        return queryset.prefetch_related(
+            MentorSessionViewSet.ordered_events()
+        ).annotate(
+            reviewed=Exists(Review.objects.filter(session=OuterRef("pk")))
         )
 
+    @staticmethod
+    def ordered_events():
+        return Prefetch("events", queryset=MentorSessionEvent.objects.order_by("start_time"))
+
+    def list_history(self, request, queryset):
+        queryset = self.filter_queryset(queryset)
+        if request.query_params.get("stream"):
+            return self.stream_history(request, queryset)
+        paginator = MentorSessionCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer_class()(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+    def stream_history(self, request, queryset, chunk_size=200):
+        """
+        Streams the whole history as one JSON array. Rows come from a server-side cursor
+        and are serialized chunk by chunk, so memory use doesn't grow with the history.
+        """
+        # iterator() skips prefetch_related, so the events are loaded per chunk instead
+        rows = queryset.prefetch_related(None).order_by("-start_time", "-id").iterator(chunk_size=chunk_size)
+        serializer_class = self.get_serializer_class()
+        renderer = JSONRenderer()
+
+        def render_chunks():
+            yield b"["
+            separator = b""
+            for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+                if not self.renders_values():
+                    prefetch_related_objects(chunk, self.ordered_events())
+                data = serializer_class(chunk, many=True, context={"request": request}).data
+                yield separator + renderer.render(data)[1:-1]
+                separator = b","
+            yield b"]"
+
+        return StreamingHttpResponse(render_chunks(), content_type="application/json")
+
     def perform_create(self, serializer):
         serializer.save(mentor=self.request.user.mentor)
 
     @action(detail=False, methods=["get"])
     def client_session_history(self, request):
-        mentor_sessions = MentorSession.objects.filter(client=self.request.user, completed=True)
-        serializer = self.serializer_class(mentor_sessions, many=True, context={"request": request})
-        return Response(status=status.HTTP_200_OK, data=serializer.data)
+        mentor_sessions = self.with_serializer_data(
+            MentorSession.objects.filter(client=self.request.user, completed=True)
+        )
+        return self.list_history(request, mentor_sessions)
 
     @action(detail=False, methods=["get"])
     def mentor_session_history(self, request):
-        mentor_sessions = MentorSession.objects.filter(mentor=self.request.user.mentor, completed=True)
-        serializer = self.serializer_class(mentor_sessions, many=True, context={"request": request})
-        return Response(status=status.HTTP_200_OK, data=serializer.data)
+        mentor_sessions = self.with_serializer_data(
+            MentorSession.objects.filter(mentor=self.request.user.mentor, completed=True)
+        )
+        return self.list_history(request, mentor_sessions)
+
+    @action(detail=False, methods=["get"])
+    def earnings_export(self, request):
+        """
+        Streams a statement of the mentor's completed sessions as CSV, or NDJSON with
+        ?output=ndjson. Filter on the session date with ?start= and ?end= (YYYY-MM-DD).
+        Prices are computed in SQL and rows are read from a server-side cursor.
+        """
+        output = request.query_params.get("output", "csv")
+        if output not in ("csv", "ndjson"):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "output must be csv or ndjson"})
+
+        mentor_sessions = MentorSession.objects.filter(mentor=request.user.mentor, completed=True)
+        for param, lookup, days in (("start", "start_time__gte", 0), ("end", "start_time__lt", 1)):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                date = parse_date(value)
+            except ValueError:
+                date = None
+            if date is None:
+                error = f"{param} must be a YYYY-MM-DD date"
+                return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": error})
+            day = make_aware(datetime.datetime.combine(date + datetime.timedelta(days=days), datetime.time.min))
+            mentor_sessions = mentor_sessions.filter(**{lookup: day})
+
+        rows = mentor_sessions.annotate(
+            billed_segments=billed_segments(),
+            amount=session_price(),
+            rating=F("review__rating")
+        ).order_by("start_time", "id").values_list(
+            "id", "start_time", "end_time", "session_length", "billed_segments", "mentor__rate", "amount", "paid",
+            "rating"
+        ).iterator(chunk_size=2000)
+
+        if output == "csv":
+            writer = csv.writer(Echo())
+            lines = chain([writer.writerow(EARNINGS_EXPORT_COLUMNS)], (writer.writerow(row) for row in rows))
+            content_type = "text/csv"
+        else:
+            lines = (
+                json.dumps(dict(zip(EARNINGS_EXPORT_COLUMNS, row)), cls=DjangoJSONEncoder) + "\n" for row in rows
+            )
+            content_type = "application/x-ndjson"
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="earnings.{output}"'
+        return response
+
+    @action(detail=True, methods=["get"], renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def live(self, request, id):
+        """
+        Streams the session's state as Server-Sent Events: a "state" event with the current
+        billing state, then "started", "paused", "resumed" and "ended" as they happen.
+        """
+        mentor_session = get_object_or_404(
+            MentorSession.objects.filter(Q(mentor=request.user.mentor) | Q(client=request.user)), id=id
+        )
+        return live.EventStreamResponse(mentor_session)
+
+    def get_locked_session(self, id):
+        """
+        Locks the session row for the rest of the request, so concurrent transitions of the
+        same session are applied one after the other. After waiting for the lock Postgres
+        returns the row's latest columns, but the started annotation may be stale.
+        """
+        return get_object_or_404(
+            MentorSession.objects.select_for_update().annotate(
+                started=Exists(MentorSessionEvent.objects.filter(mentor_session=OuterRef("pk")))
+            ),
+            id=id
+        )
 
     @action(detail=True, methods=["post"])
     def pause(self, request, id):
-        mentor_session: MentorSession = get_object_or_404(MentorSession, id=id)
+        mentor_session: MentorSession = self.get_locked_session(id)
 
         if mentor_session.completed:
             return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "This session is finished. Please create a new session."})
 
-        events = mentor_session.events.all().order_by("-start_time")
-        if not events.exists():
-            # Starting a session
+        now = make_aware(datetime.datetime.now())
+        if mentor_session.segment_started_at:
+            # Pausing
+            mentor_session.close_segment(now)
+            event = "paused"
+        else:
             # Only clients should be able to start a session - otherwise mentors abuse
-            if request.user != mentor_session.client:
+            if not mentor_session.started and request.user.id != mentor_session.client_id:
                 return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "The client must start the session"})
+            # Starting or resuming
+            mentor_session.start_segment(now)
+            event = "resumed" if mentor_session.started else "started"
+        live.publish_session_event(event, mentor_session)
 
-            MentorSessionEvent.objects.create(mentor_session=mentor_session)
-            serializer = self.serializer_class(mentor_session, context={"request": request})
-            return Response(status=status.HTTP_200_OK, data=serializer.data)
-
-        event = events[0]
-
-        if event.end_time:
-            # Resuming
-            MentorSessionEvent.objects.create(mentor_session=mentor_session)
-        else:
-            # Pausing
-            end_time = make_aware(datetime.datetime.now())
-            event.end_time = end_time
-            session_length_time = end_time - event.start_time
-            event.session_length = session_length_time.seconds
-            event.save()
         serializer = self.serializer_class(mentor_session, context={"request": request})
         return Response(status=status.HTTP_200_OK, data=serializer.data)
 
     @action(detail=True, methods=["post"])
     def end(self, request, id):
-        mentor_session: MentorSession = get_object_or_404(MentorSession, id=id)
+        mentor_session: MentorSession = self.get_locked_session(id)
 
         if mentor_session.completed:
             return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "This session is finished. Please create a new session."})
 
-        event = mentor_session.events.all().order_by("-start_time")[0]
-        end_time = make_aware(datetime.datetime.now())
-
-        if not event.end_time:
-            # Pause the last event and end the session
-            event.end_time = end_time
-            session_length_time = end_time - event.start_time
-            event.session_length = session_length_time.seconds
-            event.save()
-
-        # End the session
-        mentor_session.completed = True
-        mentor_session.end_time = end_time
-        mentor_session.session_length = mentor_session.calculate_session_length(id)
-        mentor_session.save()
+        # Pause the last event and end the session, session_length is the running total of billed seconds
+        mentor_session.complete(make_aware(datetime.datetime.now()))
+        MentorStats.record_session(mentor_session)
+        # complete() is a single UPDATE, which sends no post_save
+        invalidate_mentor_responses()
+        live.publish_session_event(live.ENDED, mentor_session)
 
         serializer = self.serializer_class(mentor_session, context={"request": request})
         return Response(status=status.HTTP_200_OK, data=serializer.data)
 
 
-class StripeAccountLinkView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
-
-    def get(self, request, *args, **kwargs):
-        domain = "https://domain.com"
-        if settings.DEBUG:
-            domain = "http://localhost:3000"
-        account_links = stripe.AccountLink.create(
-            account=self.request.user.stripe_account_id,
-            refresh_url=domain + '/stripe-connect',
-            return_url=domain + '/dashboard',
-            type='account_onboarding',
-        )
-        return Response({"url": account_links["url"]})
-
-
-class CreateStripeCheckoutView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
-
-    def post(self, request, *args, **kwargs):
-        mentor_session = MentorSession.objects.get(id=self.request.data["mentorSessionId"])
-        minutes = mentor_session.session_length / 60  # seconds
-        segments = ceil(minutes / 15)
-        price = segments * mentor_session.mentor.rate
-
-        domain = "https://domain.com"
-        if settings.DEBUG:
-            domain = "http://localhost:3000"
-        session = stripe.checkout.Session.create(
-            customer=request.user.stripe_customer_id,
-            line_items=[{
+def stripe_pending_response(user):
+    """
+    Returns an error response while the user's Stripe account and customer are still being
+    created by the provisioning task, and queues the task again if it gave up.
+    """
+    if user.stripe_status == User.StripeStatus.READY:
+        return None
+    if user.stripe_status == User.StripeStatus.FAILED:
+        User.objects.filter(pk=user.pk).update(stripe_status=User.StripeStatus.PENDING)
+        transaction.on_commit(lambda: provision_stripe.delay(user.pk))
+    return Response(
+        status=status.HTTP_409_CONFLICT,
+        data={
+            "error": "Your payment account is still being set up. Please try again in a moment.",
+            "stripe_status": User.StripeStatus.PENDING
+        },
+        headers={"Retry-After": "5"}
+    )
+
+
+@async_api_view(["GET"])
+async def stripe_account_link(request):
+    pending = await sync_to_async(stripe_pending_response)(request.user)
+    if pending:
+        return pending
+
+    domain = "https://domain.com"
+    if settings.DEBUG:
+        domain = "http://localhost:3000"
+    account_link = await stripe_client.request("post", "/v1/account_links", {
+        "account": request.user.stripe_account_id,
+        "refresh_url": domain + '/stripe-connect',
+        "return_url": domain + '/dashboard',
+        "type": 'account_onboarding',
+    })
+    return Response({"url": account_link["url"]})
+
+
+@async_api_view(["POST"])
+async def stripe_checkout(request):
+    pending = await sync_to_async(stripe_pending_response)(request.user)
+    if pending:
+        return pending
+
+    mentor_session = await sync_to_async(MentorSession.objects.select_related("mentor__user").get)(
+        id=request.data["mentorSessionId"]
+    )
+    if mentor_session.paid:
+        return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "This session has already been paid for"})
+    if not mentor_session.completed:
+        # The price is only known once the session ends
+        return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "This session isn't finished yet"})
+    if mentor_session.mentor.user.stripe_status != User.StripeStatus.READY:
+        return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "This mentor can't accept payments yet"})
+    price = mentor_session.price
+    url = mentor_session.pending_checkout_url(price)
+    if url:
+        return Response({"url": url})
+
+    domain = "https://domain.com"
+    if settings.DEBUG:
+        domain = "http://localhost:3000"
+    session = await stripe_client.request(
+        "post",
+        "/v1/checkout/sessions",
+        {
+            "customer": request.user.stripe_customer_id,
+            "line_items": [{
                 'price_data': {
                     'currency': "usd",
                     'product_data': {
@@ -210,50 +441,60 @@ class CreateStripeCheckoutView(APIView):
                 },
                 'quantity': 1,
             }],
-            mode='payment',
-            success_url=domain + '/sessions/' + str(mentor_session.id),
-            cancel_url=domain + '/sessions/' + str(mentor_session.id),
-            payment_intent_data={
+            "mode": 'payment',
+            "success_url": domain + '/sessions/' + str(mentor_session.id),
+            "cancel_url": domain + '/sessions/' + str(mentor_session.id),
+            "payment_intent_data": {
                 'application_fee_amount': 0,
                 'transfer_data': {
                     'destination': mentor_session.mentor.user.stripe_account_id,
                 },
             },
-            metadata={
+            "metadata": {
                 "session_id": mentor_session.id
             }
-        )
-        return Response({"url": session["url"]})
+        },
+        # Repeated clicks that replace the same checkout at the same price get the same one from Stripe
+        idempotency_key=f"checkout-{mentor_session.id}-{price}-{mentor_session.checkout_id or 'first'}",
+    )
+    await sync_to_async(MentorSession.objects.filter(id=mentor_session.id).update)(
+        checkout_id=session["id"],
+        checkout_url=session["url"],
+        checkout_expires_at=datetime.datetime.fromtimestamp(session["expires_at"], datetime.timezone.utc),
+        checkout_amount=price,
+    )
+    return Response({"url": session["url"]})
 
 
-class StripeCustomerPortalLinkView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+@async_api_view(["GET"])
+async def stripe_customer_portal_link(request):
+    pending = await sync_to_async(stripe_pending_response)(request.user)
+    if pending:
+        return pending
 
-    def get(self, request, *args, **kwargs):
-        domain = "https://domain.com"
-        if settings.DEBUG:
-            domain = "http://localhost:3000"
+    domain = "https://domain.com"
+    if settings.DEBUG:
+        domain = "http://localhost:3000"
 
-        session = stripe.billing_portal.Session.create(
-            customer=self.request.user.stripe_customer_id,
-            return_url=domain + '/profile/u/billing',
-        )
+    session = await stripe_client.request("post", "/v1/billing_portal/sessions", {
+        "customer": request.user.stripe_customer_id,
+        "return_url": domain + '/profile/u/billing',
+    })
 
-        return Response({"url": session["url"]})
+    return Response({"url": session["url"]})
 
 
 @csrf_exempt
 def stripe_webhook(request):
     payload = request.body
     sig_header = request.META['HTTP_STRIPE_SIGNATURE']
-    CHECKOUT_SESSION_COMPLETED = "checkout.session.completed"
 
     try:
         event = stripe.Webhook.construct_event(
             payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
         )
     except ValueError as e:
-        send_mail(
+        queue_mail(
             subject="Unsuccessful Stripe webhook.",
             message=f"An Invalid payload occurred: {e}",
             from_email="you@local.test",
@@ -262,7 +503,7 @@ def stripe_webhook(request):
         return HttpResponse(status=400)
 
     except SignatureVerificationError as e:
-        send_mail(
+        queue_mail(
             subject="Unsuccessful Stripe webhook.",
             message=f"An Invalid signature occurred: {e}",
             from_email="you@local.test",
@@ -270,53 +511,30 @@ def stripe_webhook(request):
         )
         return HttpResponse(status=400)
 
-    event_type = event['type']
-
-    if event_type == CHECKOUT_SESSION_COMPLETED:
-        session_id = event["data"]["object"]["metadata"]["session_id"]
-        customer_id = event["data"]["object"]["customer"]
-
-        client = User.objects.get(stripe_customer_id=customer_id)
-        session = MentorSession.objects.get(id=session_id)
-        session.paid = True
-        session.save()
-
-        send_mail(
-            subject="Your payment was successful",
-            message=f"Your session with {session.mentor.user.name} has now been paid for.",
-            from_email="you@local.test",
-            recipient_list=[client.email]
-        )
-
-        send_mail(
-            subject="You have received a payment!",
-            message=f"Your session with {session.mentor.user.name} has now been paid for.",
-            from_email="you@local.test",
-            recipient_list=[session.mentor.user.email]
-        )
+    # Store the event and acknowledge it straight away, a Celery task processes the inbox.
+    # Stripe retries reuse the event id, so redeliveries are dropped here.
+    StripeWebhookEvent.objects.bulk_create(
+        [StripeWebhookEvent(id=event["id"], type=event["type"], payload=json.loads(payload))],
+        ignore_conflicts=True
+    )
+    transaction.on_commit(schedule_webhook_drain)
 
     return HttpResponse(status=200)
 
 
-class StripeAccountBalance(APIView):
-    def get(self, request, *args, **kwargs):
-        stripe_account = request.user.stripe_account_id
-        balance = stripe.Balance.retrieve(stripe_account=stripe_account)
-        return Response(balance)
-
-
-class StripeAccountPayouts(APIView):
-    def get(self, request, *args, **kwargs):
-        stripe_account = request.user.stripe_account_id
-        payouts = stripe.Payout.list(stripe_account=stripe_account)
-        return Response(payouts)
-
-
-
-
-
-
+@async_api_view(["GET"])
+async def stripe_account_balance(request):
+    pending = await sync_to_async(stripe_pending_response)(request.user)
+    if pending:
+        return pending
 
+    return Response(await aget_account_data("balance", request.user.stripe_account_id))
 
 
+@async_api_view(["GET"])
+async def stripe_account_payouts(request):
+    pending = await sync_to_async(stripe_pending_response)(request.user)
+    if pending:
+        return pending
 
+    return Response(await aget_account_data("payouts", request.user.stripe_account_id))
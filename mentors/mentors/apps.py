@@ -6,3 +6,5 @@ class MentorsConfig(AppConfig):
     name = "mentors.mentors"
     verbose_name = _("Mentors")
 
+    def ready(self):
+        import mentors.mentors.signals  # noqa F401
@@ -0,0 +1,168 @@
+"""
+Live session state for both participants, sent as Server-Sent Events. Transitions publish a
+small delta on the session's Redis channel once they commit, and every open stream forwards
+what is published on its session's channel.
+
+The ASGI service reads the streams with async for (see mentors.utils.asgi), so an open stream
+waits on Redis in the event loop instead of holding a worker thread. The sync iterator serves
+runserver and the test client.
+"""
+import json
+import logging
+import time
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 15  # seconds, keeps proxies from closing an idle stream
+# Streams end after this long and the browser reconnects, so subscriptions of clients that are
+# gone without disconnecting don't pile up
+STREAM_MAX_AGE = 5 * 60
+RECONNECT_DELAY = 1000  # milliseconds
+ENDED = "ended"
+# What a client needs to show the session's timer
+STATE_FIELDS = ["billed_seconds", "segment_started_at", "completed", "end_time", "session_length"]
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def channel(session_id):
+    return f"session:{session_id}:live"
+
+
+def format_event(event, mentor_session):
+    data = {"id": mentor_session.id, **{field: getattr(mentor_session, field) for field in STATE_FIELDS}}
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def publish_session_event(event, mentor_session):
+    """Sends the session's new state to its live streams once the transaction commits."""
+    message = format_event(event, mentor_session)
+
+    def publish():
+        try:
+            get_redis().publish(channel(mentor_session.id), message)
+        except redis.RedisError:
+            # Clients pick the change up when they reconnect or refetch
+            logger.exception("Could not publish %s for session %s", event, mentor_session.id)
+
+    transaction.on_commit(publish)
+
+
+def subscribe(session_id):
+    pubsub = get_redis().pubsub()
+    pubsub.subscribe(channel(session_id))
+    return pubsub
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """The live stream of mentor_session, iterated with for or async for."""
+
+    def __init__(self, mentor_session):
+        super().__init__(event_stream(mentor_session), content_type="text/event-stream")
+        self.mentor_session = mentor_session
+        self["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream
+        self["X-Accel-Buffering"] = "no"
+
+    def __aiter__(self):
+        return async_event_stream(self.mentor_session)
+
+
+class StreamTimer:
+    """When a stream sends its next heartbeat and when it ends."""
+
+    def __init__(self, max_age):
+        self.deadline = time.monotonic() + max_age
+        self.heartbeat_at = time.monotonic() + HEARTBEAT_INTERVAL
+
+    @property
+    def running(self):
+        return time.monotonic() < self.deadline
+
+    def timeout(self):
+        return max(self.heartbeat_at - time.monotonic(), 0)
+
+    def heartbeat(self):
+        """Returns the heartbeat frame once it is due, None before."""
+        if time.monotonic() < self.heartbeat_at:
+            return None
+        self.heartbeat_at = time.monotonic() + HEARTBEAT_INTERVAL
+        return ": heartbeat\n\n"
+
+
+def opening_frames(mentor_session):
+    return [f"retry: {RECONNECT_DELAY}\n\n", format_event("state", mentor_session)]
+
+
+def is_last_frame(frame):
+    return frame.startswith(f"event: {ENDED}\n")
+
+
+def event_stream(mentor_session, max_age=STREAM_MAX_AGE):
+    """
+    Yields the session's current state, then every event published for it until the session
+    ends or max_age passes. The state is read after subscribing, so nothing published in
+    between is missed.
+    """
+    pubsub = subscribe(mentor_session.id)
+    try:
+        mentor_session.refresh_from_db(fields=STATE_FIELDS)
+        yield from opening_frames(mentor_session)
+        if mentor_session.completed:
+            return
+        timer = StreamTimer(max_age)
+        while timer.running:
+            # Also returns None early for the subscription confirmation
+            message = pubsub.get_message(ignore_subscribe_messages=True, timeout=timer.timeout())
+            if message is None:
+                heartbeat = timer.heartbeat()
+                if heartbeat:
+                    yield heartbeat
+                continue
+            frame = message["data"].decode()
+            yield frame
+            if is_last_frame(frame):
+                return
+    finally:
+        pubsub.close()
+
+
+async def async_event_stream(mentor_session, max_age=STREAM_MAX_AGE):
+    """event_stream() for the event loop."""
+    # A client per stream, the connections of an asyncio client belong to the loop they were made in
+    client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(channel(mentor_session.id))
+        await sync_to_async(mentor_session.refresh_from_db)(fields=STATE_FIELDS)
+        for frame in opening_frames(mentor_session):
+            yield frame
+        if mentor_session.completed:
+            return
+        timer = StreamTimer(max_age)
+        while timer.running:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timer.timeout())
+            if message is None:
+                heartbeat = timer.heartbeat()
+                if heartbeat:
+                    yield heartbeat
+                continue
+            frame = message["data"].decode()
+            yield frame
+            if is_last_frame(frame):
+                return
+    finally:
+        await pubsub.close()
+        await client.close()
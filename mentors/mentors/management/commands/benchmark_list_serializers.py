@@ -0,0 +1,75 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from mentors.mentors.api.serializers import (
+    MentorSerializer,
+    MentorSessionSerializer,
+    MentorSessionValuesSerializer,
+    MentorValuesSerializer,
+    ReviewSerializer,
+    ReviewValuesSerializer,
+)
+from mentors.mentors.api.views import MentorSessionViewSet
+from mentors.mentors.models import Mentor, MentorSession, Review
+from mentors.users.api.serializers import UserSerializer, UserValuesSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the list endpoints' model serializers against their values() serializers on the rows in "
+        "the database, from the query to the rendered JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Loaded the way the viewsets load them
+        cases = [
+            ("mentors", Mentor.objects.select_related("user", "stats"), MentorSerializer, MentorValuesSerializer),
+            ("reviews", Review.objects.select_related("session"), ReviewSerializer, ReviewValuesSerializer),
+            (
+                "sessions",
+                MentorSessionViewSet.with_serializer_data(MentorSession.objects.all()),
+                MentorSessionSerializer,
+                MentorSessionValuesSerializer,
+            ),
+            ("users", User.objects.all(), UserSerializer, UserValuesSerializer),
+        ]
+        user = User.objects.order_by("id").first()
+        for name, queryset, model_serializer, values_serializer in cases:
+            queryset = queryset.order_by("pk")[:options["rows"]]
+            rows = queryset.count()
+            if not rows:
+                self.stdout.write(f"{name}: no rows")
+                continue
+            model = self.best_time(options["repeat"], user, lambda context: model_serializer(
+                list(queryset), many=True, context=context
+            ))
+            values = self.best_time(options["repeat"], user, lambda context: values_serializer(
+                values_serializer.project(queryset), many=True, context=context
+            ))
+            self.stdout.write(
+                f"{name}: {rows} rows, model serializer {model / rows * 1e6:.1f} µs/row, "
+                f"values serializer {values / rows * 1e6:.1f} µs/row, {model / values:.1f}x faster"
+            )
+
+    @staticmethod
+    def best_time(repeat, user, serializer):
+        best = None
+        for _ in range(repeat):
+            # A new request each time, loaders are per request
+            request = APIRequestFactory().get("/api/")
+            request.user = user
+            start = time.perf_counter()
+            JSONRenderer().render(serializer({"request": request}).data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mentors.mentors.models import MentorStats
+from mentors.mentors.signals import invalidate_mentor_responses
+
+
+class Command(BaseCommand):
+    help = "Recomputes every mentor's denormalized stats from sessions and reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuilt = MentorStats.rebuild(batch_size=options["batch_size"])
+            invalidate_mentor_responses()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} mentors"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from mentors.utils.stripe_stub import StripeStub
+
+
+class Command(BaseCommand):
+    help = "Runs a local Stripe API stub, start the app with STRIPE_API_BASE pointing at it"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=12111)
+        parser.add_argument("--latency", type=float, default=0, help="Seconds added to every request")
+
+    def handle(self, *args, **options):
+        server = StripeStub(("127.0.0.1", options["port"]), latency=options["latency"], verbose=True)
+        self.stdout.write(self.style.SUCCESS(f"Stripe stub listening on {server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_SQL = """
+INSERT INTO mentors_mentorstats (mentor_id, completed_sessions, rating_sum, rating_count, billed_seconds, paid_cents)
+SELECT
+    m.id,
+    (SELECT COUNT(*) FROM mentors_mentorsession s WHERE s.mentor_id = m.id AND s.completed),
+    (SELECT COALESCE(SUM(r.rating), 0) FROM mentors_review r
+        JOIN mentors_mentorsession s ON s.id = r.session_id WHERE s.mentor_id = m.id),
+    (SELECT COUNT(*) FROM mentors_review r
+        JOIN mentors_mentorsession s ON s.id = r.session_id WHERE s.mentor_id = m.id),
+    (SELECT COALESCE(SUM(s.session_length), 0) FROM mentors_mentorsession s
+        WHERE s.mentor_id = m.id AND s.completed),
+    (SELECT COALESCE(SUM((s.session_length + 899) / 900 * m.rate), 0) FROM mentors_mentorsession s
+        WHERE s.mentor_id = m.id AND s.completed AND s.paid)
+FROM mentors_mentor m
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0010_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentorStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_sessions', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('billed_seconds', models.BigIntegerField(default=0)),
+                ('paid_cents', models.BigIntegerField(default=0)),
+                ('mentor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='mentors.mentor')),
+            ],
+            options={
+                'verbose_name_plural': 'mentor stats',
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import mentors.mentors.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0011_mentorstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentor',
+            name='random_key',
+            field=models.FloatField(default=mentors.mentors.models.generate_random_key),
+        ),
+        # The default is evaluated once for existing rows, give each mentor its own key
+        migrations.RunSQL("UPDATE mentors_mentor SET random_key = random()", migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='mentor',
+            index=models.Index(fields=['random_key', 'id'], name='mentor_random_key_idx'),
+        ),
+    ]
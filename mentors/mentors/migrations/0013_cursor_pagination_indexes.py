@@ -0,0 +1,21 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0012_mentor_random_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentorsession',
+            index=models.Index(fields=['-start_time', '-id'], name='session_start_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-timestamp', '-id'], name='review_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0013_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mentor',
+            name='mentor_random_key_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mentor',
+            index=models.Index(condition=models.Q(('approved', True), ('is_active', True)), fields=['random_key', 'id'], name='mentor_listed_random_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorsession',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['client', '-start_time', '-id'], name='session_client_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorsession',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['mentor', '-start_time', '-id'], name='session_mentor_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorsessionevent',
+            index=models.Index(fields=['mentor_session', '-start_time'], name='event_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+UPDATE mentors_mentorsession s
+SET billed_seconds = COALESCE((
+        SELECT SUM(e.session_length) FROM mentors_mentorsessionevent e
+        WHERE e.mentor_session_id = s.id AND e.end_time IS NOT NULL
+    ), 0),
+    segment_started_at = CASE WHEN s.completed THEN NULL ELSE (
+        SELECT e.start_time FROM mentors_mentorsessionevent e
+        WHERE e.mentor_session_id = s.id AND e.end_time IS NULL
+        ORDER BY e.start_time DESC LIMIT 1
+    ) END
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0014_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorsession',
+            name='billed_seconds',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mentorsession',
+            name='segment_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0015_mentorsession_billed_seconds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeWebhookEvent',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('type', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stripewebhookevent',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['received_at'], name='webhook_event_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0016_stripewebhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorsession',
+            name='checkout_amount',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mentorsession',
+            name='checkout_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mentorsession',
+            name='checkout_id',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='mentorsession',
+            name='checkout_url',
+            field=models.URLField(blank=True, max_length=1000),
+        ),
+    ]
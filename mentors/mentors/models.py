@@ -1,11 +1,40 @@
+import random
 import uuid
+from collections import defaultdict
+from datetime import timedelta
+from math import ceil
 
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Sum
+from django.db import connection, models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 User = get_user_model()
 
+SEGMENT_LENGTH = 15 * 60  # seconds, sessions are billed per started segment
+# A checkout this close to expiring is replaced rather than handed out again
+CHECKOUT_EXPIRY_MARGIN = timedelta(minutes=5)
+
+
+def elapsed_seconds_sql(start_column):
+    # Whole seconds between a timestamp parameter and start_column
+    return f"GREATEST(FLOOR(EXTRACT(EPOCH FROM %s - {start_column})), 0)::integer"
+
+
+def billed_segments(session_length="session_length"):
+    # Integer division, rounded up to the started segment
+    return (F(session_length) + (SEGMENT_LENGTH - 1)) / SEGMENT_LENGTH
+
+
+def session_price(session_length="session_length", rate="mentor__rate"):
+    # SQL version of MentorSession.price
+    return billed_segments(session_length) * F(rate)
+
+
+def generate_random_key():
+    return random.random()
+
 
 class Mentor(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -15,6 +44,18 @@ class Mentor(models.Model):
     bio = models.TextField()
     profile_picture = models.ImageField(blank=True, null=True)
     approved = models.BooleanField(default=False)
+    # Position in the shuffled mentor listing, re-rolled periodically by a Celery task
+    random_key = models.FloatField(default=generate_random_key)
+
+    class Meta:
+        indexes = [
+            # The shuffled listing only shows active, approved mentors
+            models.Index(
+                fields=["random_key", "id"],
+                condition=models.Q(is_active=True, approved=True),
+                name="mentor_listed_random_key_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.user.name
@@ -30,17 +71,121 @@ class MentorSession(models.Model):
     session_length = models.IntegerField(blank=True, null=True)  # seconds
     completed = models.BooleanField(default=False)
     paid = models.BooleanField(default=False)
+    # Running total of the closed segments and the start of the open one, if any
+    billed_seconds = models.IntegerField(default=0)
+    segment_started_at = models.DateTimeField(blank=True, null=True)
+    # The latest Stripe Checkout created for the session, reused until it expires or the price changes
+    checkout_id = models.CharField(max_length=255, blank=True)
+    checkout_url = models.URLField(max_length=1000, blank=True)
+    checkout_expires_at = models.DateTimeField(blank=True, null=True)
+    checkout_amount = models.IntegerField(blank=True, null=True)  # cents
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-start_time", "-id"], name="session_start_time_idx"),
+            models.Index(
+                fields=["client", "-start_time", "-id"],
+                condition=models.Q(completed=True),
+                name="session_client_history_idx"
+            ),
+            models.Index(
+                fields=["mentor", "-start_time", "-id"],
+                condition=models.Q(completed=True),
+                name="session_mentor_history_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.mentor.user.username
 
-    @classmethod
-    def calculate_session_length(cls, id):
-        mentor_session = MentorSession.objects.get(id=id)
-        event_sum = mentor_session.events\
-            .all()\
-            .aggregate(session_length_sum=Sum("session_length"))
-        return event_sum["session_length_sum"]
+    @property
+    def price(self):
+        if not self.session_length:
+            return None
+        minutes = self.session_length / 60  # seconds
+        segments = ceil(minutes / 15)
+        return segments * self.mentor.rate
+
+    def pending_checkout_url(self, amount):
+        """
+        The URL of the session's existing checkout, if it charges amount and there is still time
+        to complete it before it expires.
+        """
+        if not self.checkout_url or self.checkout_amount != amount:
+            return None
+        if self.checkout_expires_at is None or self.checkout_expires_at - CHECKOUT_EXPIRY_MARGIN <= timezone.now():
+            return None
+        return self.checkout_url
+
+    def start_segment(self, start_time):
+        """Opens a new event at start_time, unless a segment is already open."""
+        return self._transition(
+            "segment_started_at = %s", [start_time], "segment_started_at IS NULL",
+            event_sql=(
+                "INSERT INTO mentors_mentorsessionevent (id, mentor_session_id, start_time) "
+                "SELECT %s, id, segment_started_at FROM session"
+            ),
+            event_params=[uuid.uuid4()]
+        )
+
+    def close_segment(self, end_time):
+        """Closes the open event and adds it to billed_seconds, unless the session is already paused."""
+        elapsed = elapsed_seconds_sql("segment_started_at")
+        return self._transition(
+            f"billed_seconds = billed_seconds + {elapsed}, segment_started_at = NULL",
+            [end_time],
+            "segment_started_at IS NOT NULL",
+            event_sql=self.CLOSE_EVENT_SQL,
+            event_params=[end_time, end_time]
+        )
+
+    def complete(self, end_time):
+        """Closes any open event and ends the session with its total billed length."""
+        elapsed = f"COALESCE({elapsed_seconds_sql('segment_started_at')}, 0)"
+        return self._transition(
+            f"billed_seconds = billed_seconds + {elapsed}, session_length = billed_seconds + {elapsed}, "
+            f"segment_started_at = NULL, completed = TRUE, end_time = %s",
+            [end_time, end_time, end_time],
+            event_sql=self.CLOSE_EVENT_SQL,
+            event_params=[end_time, end_time]
+        )
+
+    # Closes the session's open event, run alongside the session update in _transition
+    CLOSE_EVENT_SQL = (
+        "UPDATE mentors_mentorsessionevent SET end_time = %s, "
+        f"session_length = {elapsed_seconds_sql('start_time')} "
+        "WHERE mentor_session_id IN (SELECT id FROM session) AND end_time IS NULL"
+    )
+
+    def _transition(self, assignments, params, condition="TRUE", event_sql=None, event_params=()):
+        """
+        Updates an unfinished session and its events in a single statement and copies the new
+        billing state onto the instance. The session update is conditional, so a transition that
+        lost a race to a concurrent one changes nothing and returns False.
+        """
+        sql = (
+            f"WITH session AS (UPDATE {self._meta.db_table} SET {assignments} "
+            f"WHERE id = %s AND NOT completed AND {condition} "
+            f"RETURNING id, billed_seconds, segment_started_at, completed, end_time, session_length)"
+        )
+        if event_sql:
+            sql += f", event AS ({event_sql})"
+        sql += " SELECT billed_seconds, segment_started_at, completed, end_time, session_length FROM session"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, self.id, *event_params])
+            row = cursor.fetchone()
+        if row is None:
+            return False
+        self.billed_seconds, self.segment_started_at, self.completed, self.end_time, self.session_length = row
+        return True
+
+    @property
+    def current_session_length(self):
+        """Billed seconds so far, including the open segment."""
+        current_length = self.billed_seconds
+        if self.segment_started_at:
+            current_length += (timezone.now() - self.segment_started_at).seconds
+        return current_length
 
 
 class MentorSessionEvent(models.Model):
@@ -51,6 +196,12 @@ class MentorSessionEvent(models.Model):
     end_time = models.DateTimeField(blank=True, null=True)
     session_length = models.IntegerField(blank=True, null=True)  # seconds
 
+    class Meta:
+        indexes = [
+            # pause and end look up the latest event of a session
+            models.Index(fields=["mentor_session", "-start_time"], name="event_latest_idx"),
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -61,5 +212,133 @@ class Review(models.Model):
     rating = models.IntegerField(default=5)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-timestamp", "-id"], name="review_timestamp_idx"),
+        ]
+
     def __str__(self):
         return str(self.session)
+
+
+class MentorStats(models.Model):
+    """
+    Running totals per mentor, kept up to date by the session, review and payment
+    endpoints so listings don't aggregate the whole history on every request.
+    Use the rebuild_mentor_stats management command to repair drift.
+    """
+    mentor = models.OneToOneField(Mentor, related_name="stats", on_delete=models.CASCADE)
+    completed_sessions = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    billed_seconds = models.BigIntegerField(default=0)
+    paid_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "mentor stats"
+
+    def __str__(self):
+        return str(self.mentor)
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @classmethod
+    def increment(cls, mentor_id, **amounts):
+        """Adds the given amounts to the mentor's totals in a single UPDATE."""
+        increments = {field: F(field) + amount for field, amount in amounts.items()}
+        if not cls.objects.filter(mentor_id=mentor_id).update(**increments):
+            # Mentors created before the stats table have no row yet
+            cls.objects.get_or_create(mentor_id=mentor_id)
+            cls.objects.filter(mentor_id=mentor_id).update(**increments)
+
+    @classmethod
+    def record_session(cls, mentor_session):
+        cls.increment(
+            mentor_session.mentor_id,
+            completed_sessions=1,
+            billed_seconds=mentor_session.session_length or 0
+        )
+
+    @classmethod
+    def record_review(cls, review):
+        cls.increment(review.session.mentor_id, rating_sum=review.rating, rating_count=1)
+
+    @classmethod
+    def record_payments(cls, mentor_sessions):
+        """Adds newly paid sessions to their mentors' earnings, one UPDATE per mentor."""
+        earnings = defaultdict(int)
+        for mentor_session in mentor_sessions:
+            earnings[mentor_session.mentor_id] += mentor_session.price or 0
+        for mentor_id, paid_cents in earnings.items():
+            cls.increment(mentor_id, paid_cents=paid_cents)
+
+    @classmethod
+    def rebuild(cls, batch_size=500):
+        """Recomputes every mentor's totals from the session and review tables."""
+        def total(queryset, mentor_field, expression):
+            subquery = queryset.values(mentor_field).annotate(total=expression).values("total")
+            return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+        sessions = MentorSession.objects.filter(mentor=OuterRef("pk"), completed=True).order_by()
+        reviews = Review.objects.filter(session__mentor=OuterRef("pk")).order_by()
+        mentors = Mentor.objects.order_by("id").annotate(
+            completed_sessions=total(sessions, "mentor", Count("id")),
+            billed_seconds=total(sessions, "mentor", Sum("session_length")),
+            paid_cents=total(sessions.filter(paid=True), "mentor", Sum(session_price())),
+            rating_sum=total(reviews, "session__mentor", Sum("rating")),
+            rating_count=total(reviews, "session__mentor", Count("id")),
+        ).values_list(
+            "id", "completed_sessions", "rating_sum", "rating_count", "billed_seconds", "paid_cents"
+        )
+
+        fields = ["completed_sessions", "rating_sum", "rating_count", "billed_seconds", "paid_cents"]
+        rebuilt = 0
+        batch = []
+        for row in mentors.iterator(chunk_size=batch_size):
+            batch.append(cls(mentor_id=row[0], **dict(zip(fields, row[1:]))))
+            if len(batch) == batch_size:
+                rebuilt += cls._save_batch(batch, fields)
+                batch = []
+        if batch:
+            rebuilt += cls._save_batch(batch, fields)
+        return rebuilt
+
+    @classmethod
+    def _save_batch(cls, batch, fields):
+        existing = dict(
+            cls.objects.filter(mentor_id__in=[stats.mentor_id for stats in batch]).values_list("mentor_id", "id")
+        )
+        for stats in batch:
+            stats.id = existing.get(stats.mentor_id)
+        cls.objects.bulk_update([stats for stats in batch if stats.id], fields)
+        cls.objects.bulk_create([stats for stats in batch if not stats.id])
+        return len(batch)
+
+
+class StripeWebhookEvent(models.Model):
+    """
+    Inbox of verified Stripe webhook events. The webhook only stores them, keyed by Stripe's event
+    id so redeliveries are dropped, and the process_stripe_webhook_events task handles them.
+    """
+    id = models.CharField(primary_key=True, max_length=255)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # The task drains unprocessed events oldest first
+            models.Index(
+                fields=["received_at"],
+                name="webhook_event_pending_idx",
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return self.id
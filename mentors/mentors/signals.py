@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mentors.utils.response_cache import invalidate
+
+from .models import Mentor, MentorSession, MentorStats, Review
+
+User = get_user_model()
+
+# Cached responses of MentorViewSet, which render mentors, their users and their stats
+MENTOR_RESPONSES = "mentors"
+
+
+@receiver(post_save, sender=Mentor)
+def create_mentor_stats(sender, instance, created, **kwargs):
+    if created:
+        MentorStats.objects.create(mentor=instance)
+
+
+def invalidate_mentor_responses():
+    invalidate(MENTOR_RESPONSES)
+
+
+@receiver([post_save, post_delete], sender=Mentor)
+@receiver([post_save, post_delete], sender=Review)
+@receiver(post_delete, sender=User)
+def mentor_data_changed(sender, **kwargs):
+    invalidate_mentor_responses()
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which isn't rendered
+    if update_fields != frozenset(["last_login"]):
+        invalidate_mentor_responses()
+
+
+@receiver([post_save, post_delete], sender=MentorSession)
+def mentor_session_changed(sender, instance, **kwargs):
+    # Only completed sessions count towards the mentor's stats
+    if instance.completed:
+        invalidate_mentor_responses()
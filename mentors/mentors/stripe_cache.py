@@ -0,0 +1,75 @@
+"""
+Cached reads of a connected account's Stripe balance and payouts, which the mentor dashboard
+loads on every visit. Entries are refreshed in the background once stale and dropped by the
+webhook task when a payout or charge changes them.
+"""
+from functools import partial
+
+import stripe
+from django.core.cache import cache
+
+from mentors.utils import stripe_client
+from mentors.utils.cache import aget_or_fetch, get_or_fetch, lock_key, store
+
+STRIPE_CACHE_TTL = 30  # seconds
+STRIPE_CACHE_STALE_TTL = 10 * 60
+
+FETCHERS = {
+    "balance": lambda stripe_account: stripe.Balance.retrieve(stripe_account=stripe_account),
+    "payouts": lambda stripe_account: stripe.Payout.list(stripe_account=stripe_account),
+}
+# The same calls for async views
+API_PATHS = {"balance": "/v1/balance", "payouts": "/v1/payouts"}
+
+
+def cache_key(kind, stripe_account):
+    return f"stripe:{kind}:{stripe_account}"
+
+
+def fetch(kind, stripe_account):
+    # Plain dicts, so the cache doesn't have to pickle Stripe objects
+    return FETCHERS[kind](stripe_account).to_dict_recursive()
+
+
+async def afetch(kind, stripe_account):
+    return (await stripe_client.request("get", API_PATHS[kind], stripe_account=stripe_account)).to_dict_recursive()
+
+
+def get_account_data(kind, stripe_account):
+    """Returns the account's balance or payouts ("balance" or "payouts") from the cache."""
+    # Avoid circular import
+    from mentors.mentors.tasks import refresh_stripe_account_data
+
+    return get_or_fetch(
+        cache_key(kind, stripe_account),
+        partial(fetch, kind, stripe_account),
+        STRIPE_CACHE_TTL,
+        STRIPE_CACHE_STALE_TTL,
+        revalidate=lambda: refresh_stripe_account_data.delay(kind, stripe_account),
+    )
+
+
+async def aget_account_data(kind, stripe_account):
+    """get_account_data for async views, a miss calls Stripe without blocking the event loop."""
+    # Avoid circular import
+    from mentors.mentors.tasks import refresh_stripe_account_data
+
+    return await aget_or_fetch(
+        cache_key(kind, stripe_account),
+        partial(afetch, kind, stripe_account),
+        STRIPE_CACHE_TTL,
+        STRIPE_CACHE_STALE_TTL,
+        revalidate=lambda: refresh_stripe_account_data.delay(kind, stripe_account),
+    )
+
+
+def refresh_account_data(kind, stripe_account):
+    key = cache_key(kind, stripe_account)
+    try:
+        store(key, fetch(kind, stripe_account), STRIPE_CACHE_TTL, STRIPE_CACHE_STALE_TTL)
+    finally:
+        cache.delete(lock_key(key))
+
+
+def invalidate_account_data(stripe_accounts):
+    cache.delete_many([cache_key(kind, account) for account in stripe_accounts for kind in FETCHERS])
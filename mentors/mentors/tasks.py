@@ -0,0 +1,129 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Random
+from django.utils import timezone
+
+from config import celery_app
+from mentors.mentors.models import Mentor, MentorSession, MentorStats, StripeWebhookEvent
+from mentors.mentors.signals import invalidate_mentor_responses
+from mentors.mentors.stripe_cache import invalidate_account_data, refresh_account_data
+from mentors.utils.mail import queue_mail
+
+CHECKOUT_SESSION_COMPLETED = "checkout.session.completed"
+# Events that change a connected account's cached balance or payouts
+ACCOUNT_DATA_EVENT_PREFIXES = ("payout.", "charge.", "balance.")
+WEBHOOK_BATCH_SIZE = 200
+# Events arriving within this many seconds of each other are drained by the same task run
+WEBHOOK_DRAIN_DELAY = 2
+WEBHOOK_DRAIN_SCHEDULED_KEY = "stripe-webhook-drain-scheduled"
+
+
+@celery_app.task()
+def reroll_mentor_random_keys():
+    """Draws new random keys so the shuffled mentor listing changes over time."""
+    rerolled = Mentor.objects.update(random_key=Random())
+    # update() sends no post_save, and cached pages of the old order mixed with pages of the new
+    # one would repeat some mentors and skip others
+    invalidate_mentor_responses()
+    return rerolled
+
+
+@celery_app.task()
+def refresh_stripe_account_data(kind, stripe_account):
+    """Refreshes a stale cached balance or payouts list, see mentors.mentors.stripe_cache."""
+    refresh_account_data(kind, stripe_account)
+
+
+def schedule_webhook_drain():
+    """Queues a drain of the webhook inbox, unless one is already due to run."""
+    if cache.add(WEBHOOK_DRAIN_SCHEDULED_KEY, True, timeout=WEBHOOK_DRAIN_DELAY):
+        process_stripe_webhook_events.apply_async(countdown=WEBHOOK_DRAIN_DELAY)
+
+
+@celery_app.task()
+def process_stripe_webhook_events(batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Handles the unprocessed webhook events in batches, each in its own transaction. Rows are
+    claimed with SKIP LOCKED so concurrent runs split the inbox instead of waiting on each other.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            events = list(
+                StripeWebhookEvent.objects.filter(processed_at__isnull=True)
+                .order_by("received_at")
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not events:
+                break
+            record_checkouts([event for event in events if event.type == CHECKOUT_SESSION_COMPLETED])
+            invalidate_account_data(changed_accounts(events))
+            StripeWebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+                processed_at=timezone.now()
+            )
+        processed += len(events)
+        if len(events) < batch_size:
+            break
+    return processed
+
+
+def changed_accounts(events):
+    """Connected accounts whose balance or payouts the events changed."""
+    accounts = set()
+    for event in events:
+        if not event.type.startswith(ACCOUNT_DATA_EVENT_PREFIXES):
+            continue
+        # Connect events name the account, platform charges name the account they pay out to
+        obj = event.payload.get("data", {}).get("object", {})
+        account = (
+            event.payload.get("account")
+            or (obj.get("transfer_data") or {}).get("destination")
+            or obj.get("destination")
+        )
+        if account:
+            accounts.add(account)
+    return accounts
+
+
+def record_checkouts(events):
+    """
+    Marks the sessions paid for by a batch of checkout.session.completed events. Sessions that
+    were already paid, or appear in several events, count towards the mentor's earnings once.
+    """
+    session_ids = set()
+    for event in events:
+        session_id = event.payload["data"]["object"].get("metadata", {}).get("session_id")
+        try:
+            session_ids.add(uuid.UUID(session_id))
+        except (TypeError, ValueError):
+            # Not one of our checkouts, there is nothing to mark paid
+            continue
+
+    sessions = list(
+        MentorSession.objects.select_for_update(of=("self",))
+        .select_related("client", "mentor__user")
+        .filter(id__in=session_ids, paid=False)
+        .order_by("id")
+    )
+    if not sessions:
+        return
+    # The spent checkout mustn't be handed out again
+    MentorSession.objects.filter(id__in=[session.id for session in sessions]).update(paid=True, checkout_url="")
+
+    MentorStats.record_payments(sessions)
+
+    for session in sessions:
+        queue_mail(
+            subject="Your payment was successful",
+            message=f"Your session with {session.mentor.user.name} has now been paid for.",
+            from_email="you@local.test",
+            recipient_list=[session.client.email]
+        )
+        queue_mail(
+            subject="You have received a payment!",
+            message=f"Your session with {session.mentor.user.name} has now been paid for.",
+            from_email="you@local.test",
+            recipient_list=[session.mentor.user.email]
+        )
@@ -1,15 +1,23 @@
 from typing import Any, Sequence
 
+import factory
 from django.contrib.auth import get_user_model
-from factory import Faker, post_generation
+from django.utils import timezone
+from factory import Faker, SubFactory, post_generation
 from factory.django import DjangoModelFactory
 
+from mentors.mentors.models import Mentor, MentorSession, MentorSessionEvent, Review
+
 
 class UserFactory(DjangoModelFactory):
 
     username = Faker("user_name")
     email = Faker("email")
     name = Faker("name")
+    # Provisioned, the Stripe task only runs once the creating transaction commits
+    stripe_account_id = Faker("bothify", text="acct_test################")
+    stripe_customer_id = Faker("bothify", text="cus_test################")
+    stripe_status = "ready"
 
     @post_generation
     def password(self, create: bool, extracted: Sequence[Any], **kwargs):
@@ -30,3 +38,49 @@ class UserFactory(DjangoModelFactory):
     class Meta:
         model = get_user_model()
         django_get_or_create = ["username"]
+
+
+class ApprovedMentorFactory(DjangoModelFactory):
+    """Mentors are created by the user post_save signal, so this looks them up and approves them."""
+
+    user = SubFactory(UserFactory, username=factory.Sequence(lambda n: f"mentor{n}"))
+    title = Faker("job")
+    bio = Faker("paragraph")
+
+    class Meta:
+        model = Mentor
+        django_get_or_create = ["user"]
+
+    @post_generation
+    def approve(self, create: bool, extracted: Any, **kwargs):
+        self.is_active = True
+        self.approved = True
+
+
+class MentorSessionFactory(DjangoModelFactory):
+
+    mentor = SubFactory(ApprovedMentorFactory)
+    client = SubFactory(UserFactory, username=factory.Sequence(lambda n: f"client{n}"))
+
+    class Meta:
+        model = MentorSession
+
+
+class MentorSessionEventFactory(DjangoModelFactory):
+
+    mentor_session = SubFactory(MentorSessionFactory)
+    end_time = factory.LazyFunction(timezone.now)
+    session_length = 0
+
+    class Meta:
+        model = MentorSessionEvent
+
+
+class ReviewFactory(DjangoModelFactory):
+
+    session = SubFactory(MentorSessionFactory, completed=True, session_length=900)
+    description = Faker("sentence")
+    rating = 5
+
+    class Meta:
+        model = Review
@@ -0,0 +1,394 @@
+import csv
+import datetime
+import json
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import make_aware
+from rest_framework.test import APIClient
+
+from mentors.mentors.api.serializers import MentorSessionSerializer
+from mentors.mentors.models import Mentor, MentorSession, MentorStats, StripeWebhookEvent
+from mentors.mentors.tasks import reroll_mentor_random_keys
+from mentors.mentors.tests.factories import (
+    ApprovedMentorFactory,
+    MentorSessionEventFactory,
+    MentorSessionFactory,
+    ReviewFactory,
+)
+from mentors.users.models import User
+from mentors.users.profiles import profiles
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def count_queries(client: APIClient, url: str) -> int:
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+def clear_profiles():
+    cache.clear()
+    profiles.evict()
+
+
+def count_transition_queries(client: APIClient, url: str, rf: RequestFactory) -> int:
+    """Queries a session transition takes on top of serializing the session it returns."""
+    # Both serialize with cold profile caches
+    clear_profiles()
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post(url)
+    assert response.status_code == 200
+    request = rf.get("/fake-url/")
+    request.user = response.wsgi_request.user
+    mentor_session = MentorSession.objects.get(id=response.data["id"])
+    clear_profiles()
+    with CaptureQueriesContext(connection) as serializer_ctx:
+        MentorSessionSerializer(mentor_session, context={"request": request}).data
+    queries = [query for query in ctx.captured_queries if "SAVEPOINT" not in query["sql"]]
+    return len(queries) - len(serializer_ctx.captured_queries)
+
+
+def follow_cursor(client: APIClient, url: str) -> list:
+    results = []
+    while url:
+        response = client.get(url)
+        assert "count" not in response.data
+        results += response.data["results"]
+        url = response.data["next"]
+    return results
+
+
+class TestMentorViewSet:
+    def test_list_reads_stats(self, api_client: APIClient):
+        review = ReviewFactory(rating=4)
+        ReviewFactory(session__mentor=review.session.mentor, rating=2)
+        MentorStats.rebuild()
+
+        response = api_client.get("/api/mentors/", {"page": 1})
+
+        [mentor] = response.data["results"]
+        assert mentor["session_count"] == 2
+        assert mentor["average_rating"] == 3
+
+    def test_list_query_count_is_constant(self, api_client: APIClient):
+        ApprovedMentorFactory.create_batch(2)
+        few = count_queries(api_client, "/api/mentors/?seed=0")
+
+        for mentor in ApprovedMentorFactory.create_batch(8):
+            ReviewFactory(session__mentor=mentor)
+        many = count_queries(api_client, "/api/mentors/?seed=0")
+
+        assert few == many
+
+    def test_list_pages_share_one_permutation(self, api_client: APIClient):
+        mentors = ApprovedMentorFactory.create_batch(7)
+
+        first = api_client.get("/api/mentors/", {"page_size": 3})
+        pages = [first.data] + [api_client.get(first.data["next"]).data]
+        pages.append(api_client.get(pages[1]["next"]).data)
+
+        ids = [mentor["id"] for page in pages for mentor in page["results"]]
+        assert sorted(ids) == sorted(mentor.id for mentor in mentors)
+        assert pages[2]["next"] is None
+
+    def test_list_seed_rotates_order(self, api_client: APIClient):
+        ApprovedMentorFactory.create_batch(5)
+        keys = sorted(Mentor.objects.filter(approved=True).values_list("random_key", "id"))
+
+        response = api_client.get("/api/mentors/", {"seed": keys[2][0]})
+
+        ids = [mentor["id"] for mentor in response.data["results"]]
+        assert ids == [key[1] for key in keys[2:] + keys[:2]]
+
+    def test_list_cursor_mode(self, api_client: APIClient):
+        mentors = ApprovedMentorFactory.create_batch(5)
+
+        ids = [mentor["id"] for mentor in follow_cursor(api_client, "/api/mentors/?cursor=&page_size=2")]
+
+        assert ids == sorted(mentor.id for mentor in mentors)
+
+    def test_cursor_survives_a_reroll(self, api_client: APIClient):
+        mentors = ApprovedMentorFactory.create_batch(4)
+        first = api_client.get("/api/mentors/?cursor=&page_size=2").data
+
+        reroll_mentor_random_keys()
+        second = api_client.get(first["next"]).data
+
+        ids = [mentor["id"] for mentor in first["results"] + second["results"]]
+        assert ids == sorted(mentor.id for mentor in mentors)
+
+
+class TestMentorSessionViewSet:
+    def test_end_records_stats(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(client=user)
+        api_client.post(f"/api/sessions/{mentor_session.id}/pause/")
+
+        response = api_client.post(f"/api/sessions/{mentor_session.id}/end/")
+
+        assert response.status_code == 200
+        stats = MentorStats.objects.get(mentor=mentor_session.mentor)
+        assert stats.completed_sessions == 1
+        assert stats.billed_seconds == response.data["session_length"]
+
+    def test_pause_resume_end_keeps_running_total(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(client=user)
+        api_client.post(f"/api/sessions/{mentor_session.id}/pause/")
+        api_client.post(f"/api/sessions/{mentor_session.id}/pause/")
+        api_client.post(f"/api/sessions/{mentor_session.id}/pause/")
+
+        response = api_client.post(f"/api/sessions/{mentor_session.id}/end/")
+
+        mentor_session.refresh_from_db()
+        assert mentor_session.events.count() == 2
+        assert mentor_session.events.filter(end_time__isnull=True).count() == 0
+        assert mentor_session.segment_started_at is None
+        assert response.data["session_length"] == mentor_session.billed_seconds == sum(
+            mentor_session.events.values_list("session_length", flat=True)
+        )
+
+    def test_transitions_take_two_queries(self, api_client: APIClient, user: User, rf: RequestFactory):
+        mentor_session = MentorSessionFactory(client=user)
+        url = f"/api/sessions/{mentor_session.id}"
+
+        assert count_transition_queries(api_client, f"{url}/pause/", rf) == 2  # start
+        assert count_transition_queries(api_client, f"{url}/pause/", rf) == 2  # pause
+        assert count_transition_queries(api_client, f"{url}/pause/", rf) == 2  # resume
+        # Plus one to add the session to the mentor's stats
+        assert count_transition_queries(api_client, f"{url}/end/", rf) == 3
+
+    def test_end_without_events(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(client=user)
+
+        response = api_client.post(f"/api/sessions/{mentor_session.id}/end/")
+
+        assert response.status_code == 200
+        assert response.data["session_length"] == 0
+
+    def test_history_query_count_is_constant(self, api_client: APIClient, user: User):
+        def create_sessions(count):
+            for mentor_session in MentorSessionFactory.create_batch(count, client=user, completed=True):
+                MentorSessionEventFactory.create_batch(2, mentor_session=mentor_session)
+                ReviewFactory(session=mentor_session)
+
+        create_sessions(1)
+        few = count_queries(api_client, "/api/sessions/client_session_history/")
+        create_sessions(5)
+        many = count_queries(api_client, "/api/sessions/client_session_history/")
+
+        assert few == many
+
+    def test_history_lists_events_and_length(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(client=user, completed=True, billed_seconds=600)
+        MentorSessionEventFactory.create_batch(3, mentor_session=mentor_session)
+
+        response = api_client.get("/api/sessions/client_session_history/")
+
+        [data] = response.data["results"]
+        assert len(data["events"]) == 3
+        assert data["current_session_length"] == 600
+        assert data["reviewed"] is False
+
+    def test_history_is_cursor_paginated(self, api_client: APIClient, user: User):
+        mentor_sessions = MentorSessionFactory.create_batch(3, client=user, completed=True)
+
+        results = follow_cursor(api_client, "/api/sessions/client_session_history/?page_size=2")
+
+        assert [data["id"] for data in results] == [str(session.id) for session in reversed(mentor_sessions)]
+
+    def test_history_stream(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(mentor=user.mentor, completed=True)
+        MentorSessionEventFactory.create_batch(2, mentor_session=mentor_session)
+        MentorSessionFactory.create_batch(2, mentor=user.mentor, completed=True)
+        paginated = api_client.get("/api/sessions/mentor_session_history/").data["results"]
+
+        response = api_client.get("/api/sessions/mentor_session_history/", {"stream": "1"})
+
+        assert response.streaming
+        assert json.loads(b"".join(response.streaming_content)) == json.loads(json.dumps(paginated))
+
+    def test_earnings_export_csv(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(mentor=user.mentor, completed=True, session_length=1000, paid=True)
+        ReviewFactory(session=mentor_session, rating=4)
+        MentorSessionFactory(mentor=user.mentor)
+
+        response = api_client.get("/api/sessions/earnings_export/")
+
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.DictReader(b"".join(response.streaming_content).decode().splitlines()))
+        columns = ["session_id", "billed_segments", "price", "paid", "rating"]
+        assert [tuple(row[column] for column in columns) for row in rows] == [
+            (str(mentor_session.id), "2", str(mentor_session.price), "True", "4")
+        ]
+
+    def test_earnings_export_ndjson_date_range(self, api_client: APIClient, user: User):
+        old, recent = MentorSessionFactory.create_batch(2, mentor=user.mentor, completed=True, session_length=60)
+        MentorSession.objects.filter(id=old.id).update(start_time=recent.start_time - datetime.timedelta(days=3))
+
+        response = api_client.get(
+            "/api/sessions/earnings_export/",
+            {"output": "ndjson", "start": (recent.start_time - datetime.timedelta(days=1)).date().isoformat()}
+        )
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        assert [(row["session_id"], row["price"], row["rating"]) for row in rows] == [
+            (str(recent.id), user.mentor.rate, None)
+        ]
+
+    def test_earnings_export_rejects_bad_dates(self, api_client: APIClient):
+        response = api_client.get("/api/sessions/earnings_export/", {"end": "yesterday"})
+
+        assert response.status_code == 400
+
+
+class TestReviewViewSet:
+    def test_list_without_cursor_is_unpaginated(self, api_client: APIClient):
+        ReviewFactory.create_batch(3)
+
+        response = api_client.get("/api/reviews/")
+
+        assert len(response.data) == 3
+
+    def test_list_cursor_mode(self, api_client: APIClient):
+        reviews = ReviewFactory.create_batch(5)
+
+        ids = [review["id"] for review in follow_cursor(api_client, "/api/reviews/?cursor=&page_size=2")]
+
+        assert ids == [review.id for review in reversed(reviews)]
+
+    def test_create_records_stats(self, api_client: APIClient, user: User):
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+
+        response = api_client.post("/api/reviews/", {"session": mentor_session.id, "rating": 4, "description": "Great"})
+
+        assert response.status_code == 201
+        stats = MentorStats.objects.get(mentor=mentor_session.mentor)
+        assert (stats.rating_sum, stats.rating_count) == (4, 1)
+
+    def test_create_mails_mentor_after_commit(
+        self, api_client: APIClient, user: User, settings, mailoutbox, django_capture_on_commit_callbacks
+    ):
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            api_client.post("/api/reviews/", {"session": mentor_session.id, "rating": 4, "description": "Great"})
+        assert mailoutbox == []
+        for callback in callbacks:
+            callback()
+
+        [message] = mailoutbox
+        assert message.to == [mentor_session.mentor.user.email]
+
+
+class TestStripeWebhook:
+    def test_stores_each_event_once(self, client, monkeypatch, user: User):
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=1000)
+        event = {
+            "id": "evt_1",
+            "type": "checkout.session.completed",
+            "data": {
+                "object": {"metadata": {"session_id": str(mentor_session.id)}, "customer": user.stripe_customer_id}
+            },
+        }
+        monkeypatch.setattr("stripe.Webhook.construct_event", lambda *args: event)
+
+        for _ in range(2):
+            response = client.post(
+                "/api/stripe-webhook/", event, content_type="application/json", HTTP_STRIPE_SIGNATURE="sig"
+            )
+            assert response.status_code == 200
+
+        [stored] = StripeWebhookEvent.objects.all()
+        assert (stored.id, stored.payload, stored.processed_at) == ("evt_1", event, None)
+        # Processing is left to the Celery task
+        assert not MentorSession.objects.get(id=mentor_session.id).paid
+
+
+class TestStripeViews:
+    def test_checkout_waits_for_provisioning(self, api_client: APIClient, user: User):
+        user.stripe_status = User.StripeStatus.PENDING
+        user.save()
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+
+        response = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+
+        assert response.status_code == 409
+        assert response.data["stripe_status"] == User.StripeStatus.PENDING
+
+    def test_failed_provisioning_is_queued_again(
+        self, api_client: APIClient, user: User, django_capture_on_commit_callbacks
+    ):
+        user.stripe_account_id = user.stripe_customer_id = ""
+        user.stripe_status = User.StripeStatus.FAILED
+        user.save()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.get("/api/stripe-connect/")
+
+        assert response.status_code == 409
+        user.refresh_from_db()
+        assert user.stripe_status == User.StripeStatus.READY
+
+    def test_checkout(self, api_client: APIClient, user: User, stripe_stub):
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+
+        response = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+
+        assert response.status_code == 200
+        assert response.data["url"].startswith(stripe_stub.url)
+
+    def test_checkout_needs_a_finished_unpaid_session(self, api_client: APIClient, user: User, stripe_stub):
+        unfinished = MentorSessionFactory(client=user)
+        paid = MentorSessionFactory(client=user, completed=True, session_length=60, paid=True)
+
+        for mentor_session in [unfinished, paid]:
+            response = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+            assert response.status_code == 400
+
+        assert stripe_stub.requests.count(("POST", "checkout/sessions")) == 0
+
+    def test_checkout_is_reused(self, api_client: APIClient, user: User, stripe_stub):
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+
+        first = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+        second = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+
+        assert second.data["url"] == first.data["url"]
+        assert stripe_stub.requests.count(("POST", "checkout/sessions")) == 1
+
+    def test_checkout_is_replaced_when_price_changes(self, api_client: APIClient, user: User, stripe_stub):
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+        first = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+        MentorSession.objects.filter(id=mentor_session.id).update(session_length=20 * 60)
+
+        second = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+
+        assert second.data["url"] != first.data["url"]
+        mentor_session.refresh_from_db()
+        assert mentor_session.checkout_amount == mentor_session.price
+        assert stripe_stub.requests.count(("POST", "checkout/sessions")) == 2
+
+    def test_expiring_checkout_is_replaced(self, api_client: APIClient, user: User, stripe_stub):
+        mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+        first = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+        MentorSession.objects.filter(id=mentor_session.id).update(
+            checkout_expires_at=make_aware(datetime.datetime.now() + datetime.timedelta(minutes=1))
+        )
+
+        second = api_client.post("/api/stripe-checkout/", {"mentorSessionId": mentor_session.id})
+
+        assert second.data["url"] != first.data["url"]
+        assert stripe_stub.requests.count(("POST", "checkout/sessions")) == 2
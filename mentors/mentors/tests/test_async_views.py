@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from mentors.mentors.models import MentorSession
+from mentors.mentors.tests.factories import MentorSessionFactory
+from mentors.users.models import User
+from mentors.utils.stripe_stub import StripeStub
+
+pytestmark = pytest.mark.django_db
+
+
+def auth_headers(user: User):
+    # Django 3.2's AsyncClient sends extra arguments as headers as they are
+    return {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+
+def gather(*requests):
+    async def run():
+        return await asyncio.gather(*requests)
+
+    return async_to_sync(run)()
+
+
+def test_stripe_calls_run_concurrently(user: User, stripe_stub: StripeStub, monkeypatch):
+    monkeypatch.setattr(stripe_stub, "latency", 0.3)
+    client = AsyncClient()
+
+    start = time.monotonic()
+    responses = gather(*(client.get("/api/stripe-connect/", **auth_headers(user)) for _ in range(10)))
+    elapsed = time.monotonic() - start
+
+    assert [response.status_code for response in responses] == [200] * 10
+    assert stripe_stub.requests.count(("POST", "account_links")) == 10
+    # One after the other they would take 3 seconds
+    assert elapsed < 1.5
+
+
+def test_concurrent_checkouts_share_one_stripe_checkout(user: User, stripe_stub: StripeStub):
+    mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+    client = AsyncClient()
+
+    responses = gather(*(
+        client.post(
+            "/api/stripe-checkout/", {"mentorSessionId": str(mentor_session.id)},
+            content_type="application/json", **auth_headers(user)
+        )
+        for _ in range(5)
+    ))
+
+    assert len({response.json()["url"] for response in responses}) == 1
+    assert MentorSession.objects.get(id=mentor_session.id).checkout_url == responses[0].json()["url"]
+
+
+def test_balance_miss_is_fetched_and_cached(user: User, stripe_stub: StripeStub):
+    cache.clear()
+    client = AsyncClient()
+
+    (first,) = gather(client.get("/api/stripe-account-balance/", **auth_headers(user)))
+    (second,) = gather(client.get("/api/stripe-account-balance/", **auth_headers(user)))
+
+    assert first.json()["object"] == "balance"
+    assert second.json() == first.json()
+    assert stripe_stub.requests.count(("GET", "balance")) == 1
+
+
+def test_requires_authentication(stripe_stub: StripeStub):
+    (response,) = gather(AsyncClient().get("/api/stripe-connect/"))
+
+    assert response.status_code == 403
+    assert stripe_stub.requests == []
+
+
+def test_rejects_other_methods(user: User):
+    (response,) = gather(AsyncClient().get("/api/stripe-checkout/", **auth_headers(user)))
+
+    assert response.status_code == 405
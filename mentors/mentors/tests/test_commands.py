@@ -0,0 +1,23 @@
+import pytest
+from django.core.management import call_command
+
+from mentors.mentors.models import MentorStats
+from mentors.mentors.tests.factories import MentorSessionFactory, ReviewFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_rebuild_mentor_stats():
+    review = ReviewFactory(rating=3, session__session_length=1800, session__paid=True)
+    mentor = review.session.mentor
+    MentorSessionFactory(mentor=mentor, completed=True, session_length=60)
+    MentorSessionFactory(mentor=mentor)
+    MentorStats.objects.filter(mentor=mentor).update(completed_sessions=42)
+
+    call_command("rebuild_mentor_stats")
+
+    stats = MentorStats.objects.get(mentor=mentor)
+    assert stats.completed_sessions == 2
+    assert stats.billed_seconds == 1860
+    assert stats.paid_cents == 2 * mentor.rate
+    assert stats.average_rating == 3
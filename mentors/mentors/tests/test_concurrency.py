@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from mentors.mentors.models import MentorSession, MentorStats
+from mentors.mentors.tests.factories import MentorSessionFactory
+from mentors.users.models import User
+
+# The requests run in their own threads and connections, so they need committed data
+pytestmark = pytest.mark.django_db(transaction=True)
+
+THREADS = 8
+
+
+def hammer(user: User, url: str) -> list:
+    """Posts to url from THREADS threads at once and returns the status codes."""
+    barrier = threading.Barrier(THREADS)
+
+    def post():
+        client = APIClient()
+        client.force_authenticate(user)
+        barrier.wait()
+        try:
+            return client.post(url).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        futures = [pool.submit(post) for _ in range(THREADS)]
+    return [future.result() for future in futures]
+
+
+def assert_consistent(mentor_session: MentorSession):
+    mentor_session.refresh_from_db()
+    events = list(mentor_session.events.order_by("start_time"))
+    open_events = [event for event in events if event.end_time is None]
+    assert len(open_events) <= 1
+    if open_events:
+        assert open_events[0] == events[-1]
+        assert mentor_session.segment_started_at == open_events[0].start_time
+    else:
+        assert mentor_session.segment_started_at is None
+    assert mentor_session.billed_seconds == sum(event.session_length for event in events if event.end_time)
+    return events
+
+
+def test_concurrent_pauses_toggle_one_at_a_time(user: User):
+    mentor_session = MentorSessionFactory(client=user)
+
+    statuses = hammer(user, f"/api/sessions/{mentor_session.id}/pause/")
+
+    assert statuses == [200] * THREADS
+    events = assert_consistent(mentor_session)
+    # start, pause, resume, pause, ... every other request opens an event
+    assert len(events) == THREADS // 2
+
+
+def test_concurrent_ends_complete_once(user: User):
+    mentor_session = MentorSessionFactory(client=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    client.post(f"/api/sessions/{mentor_session.id}/pause/")
+
+    statuses = hammer(user, f"/api/sessions/{mentor_session.id}/end/")
+
+    assert sorted(statuses) == [200] + [400] * (THREADS - 1)
+    events = assert_consistent(mentor_session)
+    assert [event.end_time for event in events] == [mentor_session.end_time]
+    assert mentor_session.completed
+    assert mentor_session.session_length == mentor_session.billed_seconds
+    assert MentorStats.objects.get(mentor=mentor_session.mentor).completed_sessions == 1
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from mentors.mentors.models import Mentor, MentorSession, MentorSessionEvent, MentorStats, Review
+from mentors.mentors.tests.utils import analyze, seq_scans
+from mentors.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def large_dataset():
+    """Enough rows that the planner prefers an index whenever one matches the query."""
+    rng = random.Random(0)
+    users = User.objects.bulk_create(
+        User(username=f"user{i}", stripe_customer_id=f"cus_{i}") for i in range(5000)
+    )
+    listed = set(rng.sample(range(len(users)), 500))
+    mentors = Mentor.objects.bulk_create(
+        Mentor(user=user, is_active=i in listed, approved=i in listed, random_key=rng.random())
+        for i, user in enumerate(users)
+    )
+    MentorStats.objects.bulk_create(MentorStats(mentor=mentor) for mentor in mentors)
+    sessions = MentorSession.objects.bulk_create(
+        MentorSession(mentor=rng.choice(mentors), client=rng.choice(users), completed=rng.random() < 0.9)
+        for _ in range(20000)
+    )
+    MentorSessionEvent.objects.bulk_create(MentorSessionEvent(mentor_session=session) for session in sessions)
+    Review.objects.bulk_create(
+        Review(session=session, description="", rating=rng.randint(1, 5)) for session in sessions[:5000]
+    )
+    analyze(User, Mentor, MentorStats, MentorSession, MentorSessionEvent, Review)
+    return users[0], mentors[0], sessions[0]
+
+
+def endpoint_queries(user, mentor, session):
+    """Runs the endpoints through their views and paginators and returns the SELECTs they sent."""
+    client = APIClient()
+    client.force_authenticate(user)
+    urls = [
+        # A seed near the end of the permutation, so the page reads both the head and the tail
+        "/api/mentors/?seed=0.99",
+        "/api/mentors/?cursor=",
+        "/api/reviews/?cursor=",
+        f"/api/reviews/?cursor=&mentor={mentor.pk}",
+        "/api/sessions/?cursor=",
+        "/api/sessions/client_session_history/",
+        "/api/sessions/mentor_session_history/",
+    ]
+    queries = {}
+    while urls:
+        url = urls.pop(0)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        assert response.status_code == 200
+        queries[url] = [query["sql"] for query in ctx.captured_queries if query["sql"].startswith("SELECT")]
+        # The cursor's second page is the one filtering on the cursor position
+        if url == "/api/mentors/?cursor=":
+            urls.append(response.data["next"])
+    return queries
+
+
+def latest_session_event(user, mentor, session):
+    return session.events.order_by("-start_time")[:1]
+
+
+def webhook_customer(user, mentor, session):
+    return User.objects.filter(stripe_customer_id=user.stripe_customer_id)
+
+
+LOOKUP_QUERIES = [latest_session_event, webhook_customer]
+
+
+def test_endpoint_queries_use_indexes(large_dataset):
+    # Only the table each query reads from has to be read through an index, the planner may
+    # still hash join the one-to-one lookups (users, stats) at this table size
+    scans = []
+    for url, queries in endpoint_queries(*large_dataset).items():
+        assert queries
+        for sql in queries:
+            table = sql.split(" FROM ")[1].split()[0].strip('"')
+            if table in seq_scans(sql):
+                scans.append((url, sql))
+
+    assert scans == []
+
+
+def test_lookup_queries_use_indexes(large_dataset):
+    scans = {}
+    for query in LOOKUP_QUERIES:
+        queryset = query(*large_dataset)
+        sql, params = queryset.query.sql_with_params()
+        scans[query.__name__] = queryset.model._meta.db_table in seq_scans(sql, params)
+
+    assert [query for query, scanned in scans.items() if scanned] == []
@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from mentors.mentors.live import channel, format_event, get_redis, subscribe
+from mentors.mentors.tests.factories import MentorSessionFactory
+from mentors.users.models import User
+from mentors.users.tests.factories import UserFactory
+from mentors.utils.asgi import AsyncStreamingASGIHandler
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def parse(frame: str):
+    event, data = frame.rstrip("\n").split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def open_stream(client: APIClient, mentor_session):
+    response = client.get(f"/api/sessions/{mentor_session.id}/live/", HTTP_ACCEPT="text/event-stream")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/event-stream"
+    frames = (chunk.decode() for chunk in response.streaming_content)
+    assert next(frames).startswith("retry: ")
+    return frames
+
+
+def test_transitions_are_published_after_commit(
+    api_client: APIClient, user: User, django_capture_on_commit_callbacks
+):
+    mentor_session = MentorSessionFactory(client=user)
+    pubsub = subscribe(mentor_session.id)
+    try:
+        with django_capture_on_commit_callbacks() as callbacks:
+            api_client.post(f"/api/sessions/{mentor_session.id}/pause/")
+        # Nothing is sent before the transaction commits
+        assert pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1) is None
+        for callback in callbacks:
+            callback()
+
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+        event, data = parse(message["data"].decode())
+        assert event == "started"
+        assert data["id"] == str(mentor_session.id)
+        assert data["segment_started_at"] is not None
+    finally:
+        pubsub.close()
+
+
+def test_stream_sends_state_then_deltas(api_client: APIClient, user: User, django_capture_on_commit_callbacks):
+    mentor_session = MentorSessionFactory(client=user)
+    mentor_client = APIClient()
+    mentor_client.force_authenticate(mentor_session.mentor.user)
+    frames = open_stream(mentor_client, mentor_session)
+
+    event, data = parse(next(frames))
+    assert event == "state"
+    assert data["billed_seconds"] == 0 and data["segment_started_at"] is None
+
+    for action, expected in (("pause", "started"), ("pause", "paused"), ("pause", "resumed"), ("end", "ended")):
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.post(f"/api/sessions/{mentor_session.id}/{action}/")
+        event, data = parse(next(frames))
+        assert event == expected
+
+    assert data["completed"]
+    # The stream closes once the session ends
+    assert next(frames, None) is None
+
+
+def test_stream_of_finished_session_closes_after_state(api_client: APIClient, user: User):
+    mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+    frames = open_stream(api_client, mentor_session)
+
+    assert parse(next(frames))[0] == "state"
+    assert next(frames, None) is None
+
+
+def test_stream_is_only_for_participants(user: User):
+    mentor_session = MentorSessionFactory(client=user)
+    client = APIClient()
+    client.force_authenticate(UserFactory())
+
+    response = client.get(f"/api/sessions/{mentor_session.id}/live/", HTTP_ACCEPT="text/event-stream")
+
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def keep_test_connection():
+    # Like Django's test client, the requests mustn't close the test's transaction
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    yield
+    request_started.connect(close_old_connections)
+    request_finished.connect(close_old_connections)
+
+
+def stream_over_asgi(user: User, mentor_session, on_frame):
+    """
+    Requests the live stream from the ASGI application and returns the frames it sent. The
+    client disconnects once on_frame(frames) returns True.
+    """
+    frames = []
+
+    async def run():
+        request_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                frames.append(message["body"].decode())
+                if on_frame(frames):
+                    disconnected.set()
+
+        path = f"/api/sessions/{mentor_session.id}/live/"
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"accept", b"text/event-stream"),
+                (b"authorization", f"Bearer {AccessToken.for_user(user)}".encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(AsyncStreamingASGIHandler()(scope, receive, send), timeout=5)
+
+    async_to_sync(run)()
+    return frames
+
+
+def test_asgi_stream_forwards_events_until_the_session_ends(user: User, keep_test_connection):
+    mentor_session = MentorSessionFactory(client=user)
+
+    def end_after_state(frames):
+        if len(frames) == 2:
+            mentor_session.completed = True
+            get_redis().publish(channel(mentor_session.id), format_event("ended", mentor_session))
+        return False
+
+    frames = stream_over_asgi(user, mentor_session, end_after_state)
+
+    assert frames[0].startswith("retry: ")
+    assert [parse(frame)[0] for frame in frames[1:]] == ["state", "ended"]
+
+
+def test_asgi_stream_stops_when_the_client_disconnects(user: User, keep_test_connection):
+    mentor_session = MentorSessionFactory(client=user)
+
+    frames = stream_over_asgi(user, mentor_session, lambda frames: len(frames) == 2)
+
+    assert parse(frames[1])[0] == "state"
+    # The subscription was closed with the stream
+    assert get_redis().pubsub_numsub(channel(mentor_session.id)) == [(channel(mentor_session.id).encode(), 0)]
@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from mentors.mentors.api.serializers import MentorSessionSerializer
+from mentors.mentors.api.views import MentorSessionViewSet
+from mentors.mentors.models import MentorSession
+from mentors.mentors.tests.factories import ApprovedMentorFactory, MentorSessionFactory, ReviewFactory
+from mentors.users.api.serializers import UserSerializer
+from mentors.users.loaders import get_loader
+from mentors.users.models import User
+from mentors.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def tables(ctx):
+    return [query["sql"].split(" FROM ")[1].split()[0] for query in ctx.captured_queries]
+
+
+def test_session_page_loads_each_model_once(user: User, rf):
+    mentors = ApprovedMentorFactory.create_batch(2)
+    for mentor in mentors:
+        MentorSessionFactory.create_batch(2, mentor=mentor, client=user)
+    # The other way around, the user is the mentor and a mentor is the client
+    MentorSessionFactory(mentor=user.mentor, client=mentors[0].user)
+    # A client who isn't any session's mentor
+    MentorSessionFactory(mentor=mentors[1], client=UserFactory())
+    request = rf.get("/fake-url/")
+    request.user = user
+    mentor_sessions = list(MentorSessionViewSet.with_serializer_data(MentorSession.objects.all()))
+
+    with CaptureQueriesContext(connection) as ctx:
+        data = MentorSessionSerializer(mentor_sessions, many=True, context={"request": request}).data
+
+    assert tables(ctx) == ['"mentors_mentor"', '"users_user"']
+    assert len(data) == 6
+
+
+def test_rows_are_loaded_once_per_request(user: User, rf):
+    mentor_session = MentorSessionFactory(client=user)
+    request = rf.get("/fake-url/")
+    request.user = user
+    context = {"request": request}
+    queryset = MentorSessionViewSet.with_serializer_data(MentorSession.objects.filter(pk=mentor_session.pk))
+    first = MentorSessionSerializer(list(queryset)[0], context=context).data
+    copy = list(queryset)[0]
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert MentorSessionSerializer(copy, context=context).data == first
+
+    assert ctx.captured_queries == []
+    assert copy.client is get_loader(context).instances[User][user.pk]
+
+
+def test_user_list_loads_mentors_in_one_query(rf):
+    ApprovedMentorFactory.create_batch(3)
+    users = list(User.objects.all())
+
+    with CaptureQueriesContext(connection) as ctx:
+        UserSerializer(users, many=True, context={"request": rf.get("/fake-url/")}).data
+
+    assert tables(ctx) == ['"mentors_mentor"']
+
+
+def test_review_list_query_count_is_constant():
+    user = ReviewFactory().session.client
+    client = APIClient()
+    client.force_authenticate(user)
+
+    def count():
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get("/api/reviews/").status_code == 200
+        return len(ctx.captured_queries)
+
+    few = count()
+    ReviewFactory.create_batch(5)
+    assert count() == few
@@ -1,5 +1,9 @@
+from datetime import timedelta
+
 import pytest
+from django.utils import timezone
 
+from mentors.mentors.tests.factories import MentorSessionFactory
 from mentors.users.models import User
 
 pytestmark = pytest.mark.django_db
@@ -7,3 +11,30 @@ pytestmark = pytest.mark.django_db
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.username}/"
+
+
+def test_session_segments_add_up(user: User):
+    mentor_session = MentorSessionFactory(client=user)
+    start = timezone.now()
+
+    assert mentor_session.start_segment(start)
+    assert not mentor_session.start_segment(start + timedelta(seconds=5))
+    assert mentor_session.close_segment(start + timedelta(seconds=100))
+    assert not mentor_session.close_segment(start + timedelta(seconds=200))
+    assert mentor_session.start_segment(start + timedelta(seconds=300))
+    assert mentor_session.complete(start + timedelta(seconds=350))
+
+    mentor_session.refresh_from_db()
+    assert mentor_session.billed_seconds == mentor_session.session_length == 150
+    assert mentor_session.segment_started_at is None
+    assert mentor_session.completed
+
+
+def test_session_complete_is_final(user: User):
+    mentor_session = MentorSessionFactory(client=user)
+    end_time = timezone.now()
+
+    assert mentor_session.complete(end_time)
+    assert not mentor_session.complete(end_time + timedelta(seconds=60))
+    assert not mentor_session.start_segment(end_time)
+    assert mentor_session.session_length == 0
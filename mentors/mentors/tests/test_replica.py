@@ -0,0 +1,79 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from mentors.mentors.tests.factories import ApprovedMentorFactory, MentorSessionFactory, ReviewFactory
+from mentors.users.models import User
+from mentors.utils.replica import REPLICA, ROUTER, sticky_key
+
+# The replica is a second connection, it only sees committed rows
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", REPLICA])
+
+
+@pytest.fixture(autouse=True)
+def replica_router(settings):
+    settings.DATABASE_ROUTERS = [ROUTER]
+    cache.clear()
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def get(client: APIClient, url: str):
+    """Returns the response and the tables each database was queried for."""
+    with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(
+        connections[REPLICA]
+    ) as replica:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, [q["sql"] for q in primary.captured_queries], [q["sql"] for q in replica.captured_queries]
+
+
+def test_mentor_cache_fills_read_from_primary(api_client: APIClient):
+    # A lagging replica would have them stored as the latest version
+    ApprovedMentorFactory.create_batch(2)
+
+    response, primary, replica = get(api_client, "/api/mentors/")
+
+    assert len(response.data["results"]) == 2
+    assert any("mentors_mentor" in sql for sql in primary)
+    assert replica == []
+
+
+def test_review_writes_stay_on_primary(api_client: APIClient, user: User):
+    review = ReviewFactory()
+
+    _, primary, replica = get(api_client, f"/api/reviews/{review.id}/")
+    assert replica and not primary
+
+    mentor_session = MentorSessionFactory(client=user, completed=True, session_length=60)
+    with CaptureQueriesContext(connections[REPLICA]) as replica:
+        response = api_client.post("/api/reviews/", {"session": mentor_session.id, "rating": 4, "description": "Great"})
+    assert response.status_code == 201
+    assert replica.captured_queries == []
+
+
+def test_reads_stick_to_primary_after_a_write(api_client: APIClient, user: User):
+    response = api_client.patch(f"/api/users/{user.username}/", {"first_name": "Renamed"})
+    assert response.status_code == 200
+
+    response, primary, replica = get(api_client, f"/api/users/{user.username}/")
+    assert response.data["first_name"] == "Renamed"
+    assert primary and not replica
+
+    # Once the window has passed reads go back to the replica
+    cache.delete(sticky_key(user.pk))
+    _, primary, replica = get(api_client, f"/api/users/{user.username}/")
+    assert replica and not primary
+
+
+def test_other_views_read_from_primary(api_client: APIClient):
+    _, primary, replica = get(api_client, "/api/sessions/")
+
+    assert primary and not replica
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from mentors.mentors.tests.factories import ApprovedMentorFactory, MentorSessionFactory, ReviewFactory
+from mentors.users.models import User
+from mentors.users.tests.factories import UserFactory
+from mentors.utils.response_cache import RESPONSE_RENDER_WAIT
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def get(client: APIClient, url: str):
+    """Returns the response body and the number of queries it took."""
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    # The savepoint is there because the test runs in a transaction
+    return response.content, len([query for query in ctx.captured_queries if "SAVEPOINT" not in query["sql"]])
+
+
+def test_hit_skips_queries(api_client: APIClient):
+    mentor = ApprovedMentorFactory()
+
+    for url in ["/api/mentors/?seed=0", f"/api/mentors/{mentor.user.username}/"]:
+        content, queries = get(api_client, url)
+        assert queries
+        assert get(api_client, url) == (content, 0)
+
+
+def test_writes_invalidate(api_client: APIClient):
+    mentor = ApprovedMentorFactory()
+    url = f"/api/mentors/{mentor.user.username}/"
+    get(api_client, url)
+
+    mentor.user.first_name = "Renamed"
+    mentor.user.save()
+    content, queries = get(api_client, url)
+    assert queries and json.loads(content)["user"]["first_name"] == "Renamed"
+
+    ReviewFactory(session__mentor=mentor, rating=4)
+    content, queries = get(api_client, url)
+    assert queries and json.loads(content)["user"]["username"] == mentor.user.username
+
+
+def test_ending_a_session_invalidates(api_client: APIClient, user: User):
+    mentor = ApprovedMentorFactory()
+    mentor_session = MentorSessionFactory(mentor=mentor, client=user)
+    assert api_client.post(f"/api/sessions/{mentor_session.id}/pause/").status_code == 200
+    url = f"/api/mentors/{mentor.user.username}/"
+    assert json.loads(get(api_client, url)[0])["session_count"] == 0
+
+    assert api_client.post(f"/api/sessions/{mentor_session.id}/end/").status_code == 200
+
+    assert json.loads(get(api_client, url)[0])["session_count"] == 1
+
+
+def test_shuffled_list_is_cached_per_user(api_client: APIClient):
+    ApprovedMentorFactory.create_batch(3)
+    get(api_client, "/api/mentors/")
+
+    other_client = APIClient()
+    other_client.force_authenticate(UserFactory())
+    _, queries = get(other_client, "/api/mentors/")
+
+    assert queries
+
+
+def test_stale_copy_is_served_while_another_request_renders(api_client: APIClient, monkeypatch):
+    mentor = ApprovedMentorFactory()
+    url = f"/api/mentors/{mentor.user.username}/"
+    stale, _ = get(api_client, url)
+    mentor.user.first_name = "Renamed"
+    mentor.user.save()
+
+    # Another request holds the render lock
+    add = cache.add
+
+    def lock_taken(key, *args, **kwargs):
+        return False if key.endswith(":lock") else add(key, *args, **kwargs)
+
+    monkeypatch.setattr(cache, "add", lock_taken)
+    assert get(api_client, url) == (stale, 0)
+
+    monkeypatch.setattr(cache, "add", add)
+    content, queries = get(api_client, url)
+    assert queries and json.loads(content)["user"]["first_name"] == "Renamed"
+    # The lock was released and the fresh copy stored
+    assert get(api_client, url) == (content, 0)
+
+
+def test_miss_waits_for_the_request_rendering_it(api_client: APIClient, monkeypatch):
+    mentor = ApprovedMentorFactory()
+    url = f"/api/mentors/{mentor.user.username}/"
+    locked = []
+    add = cache.add
+
+    def recording_add(key, *args, **kwargs):
+        if key.endswith(":lock"):
+            locked.append(key)
+        return add(key, *args, **kwargs)
+
+    monkeypatch.setattr(cache, "add", recording_add)
+    content, _ = get(api_client, url)
+    # The miss took the lock too
+    [lock] = locked
+    key = lock.removesuffix(":lock")
+
+    # Another request holds the render lock and stores its copy while this one waits
+    entry = cache.get(key)
+    cache.delete(key)
+    add(lock, True)
+    threading.Timer(0.2, cache.set, (key, entry)).start()
+
+    assert get(api_client, url) == (content, 0)
+
+
+def test_misses_render_right_away_when_the_cache_is_down(api_client: APIClient, monkeypatch):
+    mentor = ApprovedMentorFactory()
+    # What django_redis returns with IGNORE_EXCEPTIONS
+    monkeypatch.setattr(cache, "get", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cache, "add", lambda *args, **kwargs: None)
+
+    start = time.monotonic()
+    _, queries = get(api_client, f"/api/mentors/{mentor.user.username}/")
+
+    assert queries and time.monotonic() - start < RESPONSE_RENDER_WAIT
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from mentors.mentors.models import StripeWebhookEvent
+from mentors.mentors.stripe_cache import cache_key, get_account_data
+from mentors.mentors.tasks import process_stripe_webhook_events
+from mentors.users.models import User
+from mentors.utils.cache import MISS_WAIT, store
+from mentors.utils.stripe_stub import StripeStub
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def upstream_calls(stripe_stub: StripeStub, path: str) -> int:
+    return stripe_stub.requests.count(("GET", path))
+
+
+def test_concurrent_misses_fetch_once(stripe_stub: StripeStub, monkeypatch):
+    monkeypatch.setattr(stripe_stub, "latency", 0.2)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: get_account_data("balance", "acct_1"), range(8)))
+
+    assert upstream_calls(stripe_stub, "balance") == 1
+    assert all(result == results[0] for result in results)
+
+
+def test_misses_fetch_right_away_when_the_cache_is_down(stripe_stub: StripeStub, monkeypatch):
+    # What django_redis returns with IGNORE_EXCEPTIONS
+    monkeypatch.setattr(cache, "get", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cache, "add", lambda *args, **kwargs: None)
+
+    start = time.monotonic()
+    for _ in range(2):
+        assert get_account_data("balance", "acct_1")["object"] == "balance"
+
+    assert time.monotonic() - start < MISS_WAIT
+    assert upstream_calls(stripe_stub, "balance") == 2
+
+
+def test_stale_value_is_served_and_refreshed(stripe_stub: StripeStub):
+    store(cache_key("payouts", "acct_1"), {"data": ["stale"]}, ttl=-1, stale_ttl=60)
+
+    assert get_account_data("payouts", "acct_1") == {"data": ["stale"]}
+
+    # The refresh task runs eagerly in tests
+    assert upstream_calls(stripe_stub, "payouts") == 1
+    assert get_account_data("payouts", "acct_1")["data"] == []
+    assert upstream_calls(stripe_stub, "payouts") == 1
+
+
+def test_balance_view_is_cached(stripe_stub: StripeStub, user: User):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    for _ in range(2):
+        response = client.get("/api/stripe-account-balance/")
+        assert response.status_code == 200
+        assert response.data["object"] == "balance"
+
+    assert upstream_calls(stripe_stub, "balance") == 1
+
+
+def test_payout_events_invalidate_the_cache():
+    store(cache_key("balance", "acct_1"), {}, ttl=60, stale_ttl=60)
+    store(cache_key("payouts", "acct_2"), {}, ttl=60, stale_ttl=60)
+    StripeWebhookEvent.objects.create(id="evt_1", type="payout.paid", payload={"account": "acct_1"})
+
+    process_stripe_webhook_events()
+
+    assert cache.get(cache_key("balance", "acct_1")) is None
+    assert cache.get(cache_key("payouts", "acct_2")) is not None
@@ -0,0 +1,115 @@
+import pytest
+import stripe
+from asgiref.sync import async_to_sync
+from rest_framework.test import APIClient
+
+from mentors.users.models import User
+from mentors.utils import stripe_client
+from mentors.utils.stripe_client import CircuitBreaker, build_http_client
+from mentors.utils.stripe_stub import StripeStub
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client_settings(settings):
+    settings.STRIPE_CIRCUIT_FAILURE_THRESHOLD = 3
+    settings.STRIPE_CIRCUIT_RESET_TIMEOUT = 30
+    return settings
+
+
+def test_circuit_opens_and_fails_fast(client_settings, stripe_stub: StripeStub, monkeypatch):
+    monkeypatch.setattr(stripe, "default_http_client", build_http_client())
+    stripe_stub.failures = 3
+
+    for _ in range(3):
+        with pytest.raises(stripe.error.APIError):
+            stripe.Customer.create()
+    assert len(stripe_stub.requests) == 3
+
+    with pytest.raises(stripe.error.APIConnectionError):
+        stripe.Customer.create()
+    # Failed without calling the stub
+    assert len(stripe_stub.requests) == 3
+    assert stripe.default_http_client.metrics()["circuit"] == "open"
+
+
+def test_circuit_lets_a_trial_call_through_after_the_timeout(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("mentors.utils.stripe_client.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 31
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # Only one trial at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_latency_is_recorded_per_api_method(stripe_stub: StripeStub):
+    customer = stripe.Customer.create()
+    stripe.Customer.retrieve(customer.id)
+    stripe.Customer.create()
+
+    latency = stripe.default_http_client.metrics()["latency"]
+    assert latency["POST /v1/customers"]["count"] == 2
+    assert latency["POST /v1/customers"]["buckets"]["+Inf"] == 2
+    assert latency["GET /v1/customers/{id}"]["count"] == 1
+
+
+@pytest.fixture
+def async_sessions(monkeypatch):
+    """The async clients the Stripe client opens."""
+    client = stripe.default_http_client
+    sessions = []
+    build_async_session = client.build_async_session
+
+    def record():
+        sessions.append(build_async_session())
+        return sessions[-1]
+
+    monkeypatch.setattr(client, "build_async_session", record)
+    return sessions
+
+
+def test_async_calls_close_their_client_by_default(async_sessions):
+    # Like async views under WSGI, each call runs in a new loop
+    for _ in range(2):
+        async_to_sync(stripe_client.request)("get", "/v1/balance")
+
+    assert len(async_sessions) == 2
+    assert all(session.is_closed for session in async_sessions)
+    assert not stripe.default_http_client.async_sessions
+
+
+def test_async_calls_share_the_loops_client(async_sessions):
+    stripe_client.share_async_sessions()
+
+    async def call_twice():
+        await stripe_client.request("get", "/v1/balance")
+        await stripe_client.request("get", "/v1/payouts")
+
+    async_to_sync(call_twice)()
+
+    [session] = async_sessions
+    assert not session.is_closed
+    async_to_sync(session.aclose)()
+
+
+def test_metrics_view_is_admin_only(user: User):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    assert api_client.get("/api/stripe-metrics/").status_code == 403
+
+    user.is_staff = True
+    user.save()
+    response = api_client.get("/api/stripe-metrics/")
+    assert response.status_code == 200
+    assert response.data["circuit"] == "closed"
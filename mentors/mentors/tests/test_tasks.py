@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from mentors.mentors.api.views import MentorViewSet
+from mentors.mentors.models import Mentor, MentorSession, MentorStats, StripeWebhookEvent
+from mentors.mentors.tasks import CHECKOUT_SESSION_COMPLETED, process_stripe_webhook_events, reroll_mentor_random_keys
+from mentors.mentors.tests.factories import ApprovedMentorFactory, MentorSessionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reroll_mentor_random_keys(settings):
+    ApprovedMentorFactory.create_batch(3)
+    before = set(Mentor.objects.values_list("random_key", flat=True))
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+
+    task_result = reroll_mentor_random_keys.delay()
+
+    assert task_result.result == 3
+    assert before.isdisjoint(Mentor.objects.values_list("random_key", flat=True))
+
+
+def test_reroll_mentor_random_keys_invalidates_cached_pages(settings, user):
+    ApprovedMentorFactory.create_batch(3)
+    client = APIClient()
+    client.force_authenticate(user)
+    client.get("/api/mentors/?seed=0")
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+
+    reroll_mentor_random_keys.delay()
+
+    with CaptureQueriesContext(connection) as ctx:
+        content = client.get("/api/mentors/?seed=0").content
+
+    assert ctx.captured_queries
+    ids = [mentor["id"] for mentor in json.loads(content)["results"]]
+    assert ids == list(MentorViewSet.queryset.order_by("random_key", "id").values_list("id", flat=True))
+
+
+def checkout_event(event_id, mentor_session):
+    return StripeWebhookEvent.objects.create(
+        id=event_id,
+        type=CHECKOUT_SESSION_COMPLETED,
+        payload={"data": {"object": {"metadata": {"session_id": str(mentor_session.id)}}}}
+    )
+
+
+def test_process_stripe_webhook_events(mailoutbox, django_capture_on_commit_callbacks):
+    mentor = ApprovedMentorFactory()
+    mentor_sessions = MentorSessionFactory.create_batch(
+        3, mentor=mentor, completed=True, session_length=1000, checkout_url="https://checkout.stripe.com/c/pay"
+    )
+    for i, mentor_session in enumerate(mentor_sessions):
+        checkout_event(f"evt_{i}", mentor_session)
+    # A second event for a session that is already being paid, and one the task doesn't handle
+    checkout_event("evt_repeat", mentor_sessions[0])
+    StripeWebhookEvent.objects.create(id="evt_payout", type="payout.paid", payload={})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        processed = process_stripe_webhook_events.delay(batch_size=2).result
+
+    assert processed == 5
+    assert not StripeWebhookEvent.objects.filter(processed_at__isnull=True).exists()
+    assert MentorSession.objects.filter(paid=True).count() == 3
+    # Paid sessions don't hand out their spent checkout
+    assert not MentorSession.objects.exclude(checkout_url="").exists()
+    assert MentorStats.objects.get(mentor=mentor).paid_cents == 3 * 2 * mentor.rate
+    assert len(mailoutbox) == 6
+
+
+def test_process_stripe_webhook_events_coalesces_checkouts():
+    def queries(count):
+        for mentor_session in MentorSessionFactory.create_batch(count, completed=True, session_length=60):
+            checkout_event(f"evt_{mentor_session.id}", mentor_session)
+        with CaptureQueriesContext(connection) as ctx:
+            process_stripe_webhook_events()
+        return len(ctx.captured_queries)
+
+    # Only the per-mentor stats updates grow with the number of mentors paid
+    assert queries(5) - queries(1) == 4
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.http import Http404
+from rest_framework.test import APIClient
+
+from mentors.mentors.api.views import MentorSessionViewSet, MentorViewSet
+from mentors.mentors.models import MentorSession, MentorSessionEvent
+from mentors.mentors.tests.factories import ApprovedMentorFactory, MentorSessionFactory
+from mentors.users.models import User
+
+# Outside of a test transaction, so in_atomic_block shows what the request opened
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def in_atomic_block(monkeypatch):
+    """Records whether each call of the patched method ran inside a transaction."""
+    calls = []
+
+    def spy(cls, name):
+        original = getattr(cls, name)
+
+        def wrapper(*args, **kwargs):
+            calls.append(connection.in_atomic_block)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(cls, name, wrapper)
+
+    return spy, calls
+
+
+def test_reads_run_outside_a_transaction(api_client: APIClient, in_atomic_block):
+    spy, calls = in_atomic_block
+    spy(MentorViewSet, "get_queryset")
+    ApprovedMentorFactory()
+
+    assert api_client.get("/api/mentors/").status_code == 200
+
+    assert calls and not any(calls)
+
+
+def test_writes_run_in_a_transaction(api_client: APIClient, user: User, in_atomic_block):
+    spy, calls = in_atomic_block
+    spy(MentorSessionViewSet, "get_locked_session")
+    mentor_session = MentorSessionFactory(client=user)
+
+    assert api_client.post(f"/api/sessions/{mentor_session.id}/pause/").status_code == 200
+
+    assert calls == [True]
+
+
+def test_failed_write_is_rolled_back(api_client: APIClient, user: User, monkeypatch):
+    mentor_session = MentorSessionFactory(client=user)
+
+    def fail(*args, **kwargs):
+        raise Http404
+
+    # The segment is opened, then the request fails and DRF answers with a 404
+    monkeypatch.setattr(MentorSessionViewSet, "serializer_class", fail)
+    response = api_client.post(f"/api/sessions/{mentor_session.id}/pause/")
+
+    assert response.status_code == 404
+    assert not MentorSessionEvent.objects.filter(mentor_session=mentor_session).exists()
+    assert MentorSession.objects.get(id=mentor_session.id).segment_started_at is None
@@ -0,0 +1,118 @@
+import datetime
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from mentors.mentors.api.serializers import (
+    MentorSerializer,
+    MentorSessionSerializer,
+    MentorSessionValuesSerializer,
+    MentorValuesSerializer,
+    ReviewSerializer,
+    ReviewValuesSerializer,
+)
+from mentors.mentors.api.views import MentorSessionViewSet
+from mentors.mentors.models import Mentor, MentorSession, MentorStats, Review
+from mentors.mentors.tests.factories import (
+    ApprovedMentorFactory,
+    MentorSessionEventFactory,
+    MentorSessionFactory,
+    ReviewFactory,
+)
+from mentors.users.api.serializers import UserSerializer, UserValuesSerializer
+from mentors.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def context(user: User, rf):
+    request = rf.get("/fake-url/")
+    request.user = user
+    return {"request": request}
+
+
+@pytest.fixture
+def rows(user: User):
+    """Sessions, reviews and mentors covering the cases the serializers branch on."""
+    mentor = ApprovedMentorFactory(user__first_name="Ada")
+    Mentor.objects.filter(pk=mentor.pk).update(profile_picture="mentors/picture.png")
+    unreviewed = MentorSessionFactory(mentor=mentor, client=user, completed=True, session_length=0)
+    MentorSessionEventFactory(mentor_session=unreviewed, end_time=timezone.now() + datetime.timedelta(seconds=95))
+    ReviewFactory(session__mentor=mentor, session__session_length=1000, rating=4)
+    # The user as the mentor, with a session that hasn't started
+    MentorSessionFactory(mentor=user.mentor, client=mentor.user)
+    MentorStats.rebuild()
+    # A mentor whose stats predate the stats table
+    MentorStats.objects.filter(mentor=ApprovedMentorFactory()).delete()
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize("model_serializer, values_serializer, queryset", [
+    (MentorSerializer, MentorValuesSerializer, Mentor.objects.select_related("user", "stats")),
+    (ReviewSerializer, ReviewValuesSerializer, Review.objects.select_related("session")),
+    (
+        MentorSessionSerializer,
+        MentorSessionValuesSerializer,
+        MentorSessionViewSet.with_serializer_data(MentorSession.objects.all()),
+    ),
+    (UserSerializer, UserValuesSerializer, User.objects.all()),
+])
+def test_renders_the_same_json(rows, context, model_serializer, values_serializer, queryset):
+    queryset = queryset.order_by("pk")
+
+    expected = render(model_serializer(list(queryset), many=True, context=context).data)
+    rendered = render(values_serializer(values_serializer.project(queryset), many=True, context=context).data)
+
+    assert rendered == expected
+
+
+# Reviews don't render the mentor
+@pytest.mark.parametrize("values_serializer, queryset", [
+    (MentorValuesSerializer, Mentor.objects.select_related("user", "stats")),
+    (MentorSessionValuesSerializer, MentorSessionViewSet.with_serializer_data(MentorSession.objects.all())),
+    (UserValuesSerializer, User.objects.all()),
+])
+def test_renders_picture_urls(rows, context, values_serializer, queryset):
+    rendered = render(values_serializer(values_serializer.project(queryset), many=True, context=context).data)
+
+    assert b"http://testserver/media/mentors/picture.png" in rendered
+
+
+def test_list_endpoints_use_values(rows, user: User, monkeypatch):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Rendered with a model serializer")
+
+    for serializer in [MentorSerializer, ReviewSerializer, MentorSessionSerializer, UserSerializer]:
+        monkeypatch.setattr(serializer, "to_representation", fail)
+    for url in ["/api/mentors/", "/api/reviews/", "/api/sessions/", "/api/users/"]:
+        assert client.get(url).status_code == 200
+    response = client.get("/api/sessions/mentor_session_history/", {"stream": 1})
+    assert b"".join(response.streaming_content).startswith(b"[")
+
+
+def test_benchmark(rows):
+    out = StringIO()
+
+    call_command("benchmark_list_serializers", rows=10, repeat=1, stdout=out)
+
+    line = re.compile(
+        r"(\w+): (\d+) rows, model serializer (\d+\.\d) µs/row, values serializer (\d+\.\d) µs/row, (\d+\.\d)x faster"
+    )
+    results = [line.fullmatch(output) for output in out.getvalue().splitlines()]
+    assert all(results)
+    assert [result[1] for result in results] == ["mentors", "reviews", "sessions", "users"]
+    for result in results:
+        assert 0 < int(result[2]) <= 10
+        assert float(result[3]) > 0 and float(result[4]) > 0
@@ -0,0 +1,22 @@
+from django.db import connection
+
+
+def seq_scans(sql, params=None):
+    """Returns the tables that the query plan reads with a sequential scan."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        [plan] = cursor.fetchone()[0]
+    nodes = [plan["Plan"]]
+    tables = []
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            tables.append(node["Relation Name"])
+        nodes += node.get("Plans", [])
+    return tables
+
+
+def analyze(*models):
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
@@ -3,6 +3,9 @@ from dj_rest_auth.registration.serializers import RegisterSerializer
 from rest_framework import serializers
 
 from mentors.mentors.models import Mentor
+from mentors.users.loaders import LoaderListSerializer, LoadRelatedMixin
+from mentors.users.profiles import get_profile, profiles
+from mentors.utils.values_serializers import ValuesSerializer, file_url
 
 User = get_user_model()
 
@@ -16,7 +19,7 @@ class MentorProfilePictureSerializer(serializers.ModelSerializer):
         read_only_fields = ["profile_picture"]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(LoadRelatedMixin, serializers.ModelSerializer):
     profile_picture = serializers.SerializerMethodField()
     is_mentor = serializers.SerializerMethodField()
     name = serializers.SerializerMethodField()
@@ -25,17 +28,66 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ["id", "username", "first_name", "last_name", "name", "profile_picture", "is_mentor"]
         read_only_fields = ["id", "username", "profile_picture", "is_mentor"]
+        list_serializer_class = LoaderListSerializer
+
+    def load_related(self, loader, instances):
+        # The mentor row is only read to build a profile this process doesn't have
+        loader.attach([user for user in instances if not profiles.cached_locally(user.pk)], "mentor")
 
     def get_profile_picture(self, obj):
-        return MentorProfilePictureSerializer(obj.mentor, context=self.context).data["profile_picture"]
+        # The same URL MentorProfilePictureSerializer renders
+        url = get_profile(obj.pk, lambda: obj)["profile_picture"]
+        request = self.context.get("request")
+        if url and request is not None:
+            return request.build_absolute_uri(url)
+        return url
 
     def get_is_mentor(self, obj):
-        return obj.mentor.approved
+        return get_profile(obj.pk, lambda: obj)["is_mentor"]
 
     def get_name(self, obj):
         return obj.get_full_name()
 
 
+def user_values(prefix="", mentor_prefix=None):
+    """The values() columns user_representation() reads."""
+    if mentor_prefix is None:
+        mentor_prefix = f"{prefix}mentor__"
+    return [
+        f"{prefix}id",
+        f"{prefix}username",
+        f"{prefix}first_name",
+        f"{prefix}last_name",
+        f"{mentor_prefix}approved",
+        f"{mentor_prefix}profile_picture",
+    ]
+
+
+def user_representation(row, context, prefix="", mentor_prefix=None):
+    """What UserSerializer renders, from the user_values() columns of row."""
+    if mentor_prefix is None:
+        mentor_prefix = f"{prefix}mentor__"
+    first_name, last_name = row[f"{prefix}first_name"], row[f"{prefix}last_name"]
+    return {
+        "id": row[f"{prefix}id"],
+        "username": row[f"{prefix}username"],
+        "first_name": first_name,
+        "last_name": last_name,
+        # User.get_full_name()
+        "name": f"{first_name} {last_name}".strip(),
+        "profile_picture": file_url(row[f"{mentor_prefix}profile_picture"], Mentor.profile_picture.field, context),
+        "is_mentor": row[f"{mentor_prefix}approved"],
+    }
+
+
+class UserValuesSerializer(ValuesSerializer):
+    """UserSerializer for lists."""
+    values = user_values()
+
+    def to_representation(self, row):
+        return user_representation(row, self.context)
+
+
 class CustomRegisterSerializer(RegisterSerializer):
     first_name = serializers.CharField(
         max_length=50,
@@ -3,16 +3,34 @@ from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
-from .serializers import UserSerializer, CustomRegisterSerializer
+
+from mentors.users.profiles import profiles
+from mentors.utils import stripe_client
+from mentors.utils.mail import MAIL_QUEUE, mail_queue_depth
+from mentors.utils.replica import ReplicaReadMixin
+from mentors.utils.transactions import AtomicWritesMixin
+from mentors.utils.values_serializers import ValuesListMixin
+from .serializers import UserSerializer, UserValuesSerializer, CustomRegisterSerializer
 
 
 User = get_user_model()
 
 
-class UserViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, GenericViewSet):
+class UserViewSet(
+    AtomicWritesMixin,
+    ReplicaReadMixin,
+    ValuesListMixin,
+    RetrieveModelMixin,
+    ListModelMixin,
+    UpdateModelMixin,
+    GenericViewSet,
+):
     serializer_class = UserSerializer
+    values_serializer_class = UserValuesSerializer
     queryset = User.objects.all()
     lookup_field = "username"
 
@@ -32,3 +50,27 @@ class UserViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, GenericV
 
 class CustomRegisterView(RegisterView):
     serializer_class = CustomRegisterSerializer
+
+
+class MailQueueView(AtomicWritesMixin, APIView):
+    """Reports how many mail batches are waiting for a Celery worker, for monitoring."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"queue": MAIL_QUEUE, "depth": mail_queue_depth()})
+
+
+class StripeMetricsView(AtomicWritesMixin, APIView):
+    """Reports the Stripe circuit breaker state and call latencies of the process serving it."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(stripe_client.metrics())
+
+
+class CacheMetricsView(AtomicWritesMixin, APIView):
+    """Reports the hits and misses of the in-process profile cache of the process serving it."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"profiles": profiles.stats()})
@@ -7,6 +7,9 @@ class UsersConfig(AppConfig):
     verbose_name = _("Users")
 
     def ready(self):
+        from mentors.utils import stripe_client
+
+        stripe_client.configure()
         try:
             import mentors.users.signals  # noqa F401
         except ImportError:
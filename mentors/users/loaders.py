@@ -0,0 +1,47 @@
+"""
+The users and mentors serializers follow, loaded once per request through a shared Loader. A
+serializer using LoadRelatedMixin loads the relations its fields read for the whole page it
+renders before rendering any of it, so a page costs one query per model.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from mentors.mentors.models import Mentor
+from mentors.utils.loader import Loader
+
+User = get_user_model()
+
+
+def get_loader(context):
+    """The loader shared by every serializer rendering for the same request."""
+    request = context.get("request")
+    loader = getattr(request, "loader", None) if request is not None else context.get("loader")
+    if loader is None:
+        loader = Loader({
+            User: User.objects.select_related("mentor"),
+            Mentor: Mentor.objects.select_related("user"),
+        })
+        if request is not None:
+            request.loader = loader
+        else:
+            context["loader"] = loader
+    return loader
+
+
+class LoaderListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        instances = list(data.all() if hasattr(data, "all") else data)
+        self.child.load_related(get_loader(self.context), instances)
+        return super().to_representation(instances)
+
+
+class LoadRelatedMixin:
+    """Set Meta.list_serializer_class to LoaderListSerializer and implement load_related()."""
+
+    def load_related(self, loader, instances):
+        raise NotImplementedError
+
+    def to_representation(self, instance):
+        if not isinstance(self.parent, LoaderListSerializer):
+            self.load_related(get_loader(self.context), [instance])
+        return super().to_representation(instance)
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_stripe_customer_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='stripe_customer_id',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+# Users created before provisioning moved to a task already have their Stripe objects. Any that
+# are missing one are marked failed, so the next Stripe view they open queues the task again.
+BACKFILL_SQL = """
+UPDATE users_user
+SET stripe_status = CASE
+    WHEN stripe_account_id <> '' AND stripe_customer_id <> '' THEN 'ready' ELSE 'failed'
+END
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_stripe_customer_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='stripe_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
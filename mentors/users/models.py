@@ -1,20 +1,17 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db.models import CharField
+from django.db import transaction
+from django.db.models import CharField, TextChoices
 from django.db.models.signals import post_save
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from django.core.mail import EmailMultiAlternatives
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 
 from django_rest_passwordreset.signals import reset_password_token_created
 
-import stripe
-
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from mentors.utils.mail import queue_mail
 
 
 class User(AbstractUser):
@@ -24,10 +21,17 @@ class User(AbstractUser):
     check forms.SignupForm and forms.SocialSignupForms accordingly.
     """
 
+    class StripeStatus(TextChoices):
+        PENDING = "pending", _("Pending")
+        READY = "ready", _("Ready")
+        FAILED = "failed", _("Failed")
+
     #: First and last name do not cover name patterns around the globe
     name = CharField(_("Name of User"), blank=True, max_length=255)
     stripe_account_id = CharField(max_length=100)
-    stripe_customer_id = CharField(max_length=100)
+    stripe_customer_id = CharField(max_length=100, db_index=True)  # looked up by the Stripe webhook
+    # Whether the Stripe account and customer have been created by the provisioning task
+    stripe_status = CharField(max_length=10, choices=StripeStatus.choices, default=StripeStatus.PENDING)
 
     def get_absolute_url(self):
         """Get url for user's detail view.
@@ -42,21 +46,16 @@ class User(AbstractUser):
 def post_save_user_receiver(sender, instance, created, **kwargs):
     if created:
         instance.name = f"{instance.first_name} {instance.last_name}"
-        account = stripe.Account.create(
-            type='express',
-        )
-        instance.stripe_account_id = account["id"]
-        customer = stripe.Customer.create(
-            email=instance.email,
-            name=instance.name
-        )
-        instance.stripe_customer_id = customer["id"]
-        instance.save()
+        User.objects.filter(pk=instance.pk).update(name=instance.name)
 
         # Avoid circular import
         from mentors.mentors.models import Mentor
+        from mentors.users.tasks import provision_stripe
         Mentor.objects.create(user=instance)
 
+        # Creating the Stripe account and customer takes two API round trips, keep them out of signup
+        transaction.on_commit(lambda: provision_stripe.delay(instance.pk))
+
 
 post_save.connect(post_save_user_receiver, sender=User)
 
@@ -92,7 +91,7 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
     email_html_message = render_to_string('email/user_reset_password.html', context)
     email_plaintext_message = render_to_string('email/user_reset_password.txt', context)
 
-    msg = EmailMultiAlternatives(
+    queue_mail(
         # title:
         "Password Reset for {title}".format(title="Mentors"),
         # message:
@@ -100,7 +99,6 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
         # from:
         "noreply@somehost.local",
         # to:
-        [reset_password_token.user.email]
+        [reset_password_token.user.email],
+        html_message=email_html_message
     )
-    msg.attach_alternative(email_html_message, "text/html")
-    msg.send()
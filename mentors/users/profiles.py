@@ -0,0 +1,30 @@
+"""
+What serializers render about a user besides their own columns: their name, whether they are an
+approved mentor and their profile picture. Hot profiles are served from memory, the signal
+receivers in signals.py drop a profile when the user or their mentor row changes.
+"""
+from mentors.utils.replica import reading_from_replica
+from mentors.utils.tiered_cache import TieredCache
+
+profiles = TieredCache("profiles", max_size=5000, local_ttl=10)
+
+
+def build_profile(user):
+    mentor = user.mentor
+    return {
+        "username": user.username,
+        "full_name": user.get_full_name(),
+        "is_mentor": mentor.approved,
+        # Relative to the request unless the storage serves absolute URLs
+        "profile_picture": mentor.profile_picture.url if mentor.profile_picture else None,
+    }
+
+
+def get_profile(user_id, get_user):
+    """Returns the user's profile, get_user() is only called to build a missing one."""
+    # A user loaded from a lagging replica may predate the last invalidation
+    return profiles.get(user_id, lambda: build_profile(get_user()), store=not reading_from_replica.get())
+
+
+def invalidate_profiles(user_ids):
+    profiles.invalidate(user_ids)
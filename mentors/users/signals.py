@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mentors.mentors.models import Mentor
+
+from .profiles import invalidate_profiles
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which isn't part of the profile
+    if update_fields != frozenset(["last_login"]):
+        invalidate_profiles([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Mentor)
+def mentor_changed(sender, instance, **kwargs):
+    invalidate_profiles([instance.user_id])
@@ -1,11 +1,82 @@
+import stripe
+from celery.utils.time import get_exponential_backoff_interval
 from django.contrib.auth import get_user_model
+from django.core.mail import get_connection
 
 from config import celery_app
+from mentors.utils.mail import build_message
 
 User = get_user_model()
 
+RETRY_BACKOFF_MAX = 60 * 60  # seconds
+
+MAIL_MAX_RETRIES = 8
+MAIL_RETRY_BACKOFF = 30  # seconds, doubled on every retry
+
+STRIPE_MAX_RETRIES = 6
+STRIPE_RETRY_BACKOFF = 5  # seconds, doubled on every retry
+# Errors worth retrying, anything else (e.g. an invalid request) won't succeed on a second try
+STRIPE_RETRYABLE_ERRORS = (stripe.error.APIConnectionError, stripe.error.APIError, stripe.error.RateLimitError)
+
 
 @celery_app.task()
 def get_users_count():
     """A pointless Celery task to demonstrate usage."""
     return User.objects.count()
+
+
+@celery_app.task(bind=True, max_retries=MAIL_MAX_RETRIES)
+def send_mail_batch(self, batch):
+    """
+    Sends a batch of messages queued by mentors.utils.mail.queue_mail over a single backend
+    connection. When the provider fails, only the messages that weren't sent yet are retried.
+    """
+    sent = 0
+    try:
+        with get_connection() as connection:
+            for mail in batch:
+                build_message(mail, connection=connection).send()
+                sent += 1
+    except Exception as exc:
+        countdown = get_exponential_backoff_interval(
+            MAIL_RETRY_BACKOFF, self.request.retries, RETRY_BACKOFF_MAX, full_jitter=True
+        )
+        raise self.retry(args=[batch[sent:]], exc=exc, countdown=countdown)
+    return sent
+
+
+@celery_app.task(bind=True, max_retries=STRIPE_MAX_RETRIES)
+def provision_stripe(self, user_id):
+    """
+    Creates the user's Stripe Connect account and customer. Each object is saved as soon as it
+    exists and created with an idempotency key, so retries and duplicate deliveries of the
+    task never create a second one.
+    """
+    user = User.objects.get(pk=user_id)
+    if user.stripe_status == User.StripeStatus.READY:
+        return user.stripe_status
+    try:
+        if not user.stripe_account_id:
+            account = stripe.Account.create(type="express", idempotency_key=f"user-{user.pk}-account")
+            user.stripe_account_id = account["id"]
+            user.save(update_fields=["stripe_account_id"])
+        if not user.stripe_customer_id:
+            customer = stripe.Customer.create(
+                email=user.email, name=user.name, idempotency_key=f"user-{user.pk}-customer"
+            )
+            user.stripe_customer_id = customer["id"]
+            user.save(update_fields=["stripe_customer_id"])
+    except STRIPE_RETRYABLE_ERRORS as exc:
+        if self.request.retries < self.max_retries:
+            countdown = get_exponential_backoff_interval(
+                STRIPE_RETRY_BACKOFF, self.request.retries, RETRY_BACKOFF_MAX, full_jitter=True
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        User.objects.filter(pk=user.pk).update(stripe_status=User.StripeStatus.FAILED)
+        raise
+    except stripe.error.StripeError:
+        User.objects.filter(pk=user.pk).update(stripe_status=User.StripeStatus.FAILED)
+        raise
+
+    User.objects.filter(pk=user.pk).update(stripe_status=User.StripeStatus.READY)
+    return User.StripeStatus.READY
@@ -10,6 +10,10 @@ class UserFactory(DjangoModelFactory):
     username = Faker("user_name")
     email = Faker("email")
     name = Faker("name")
+    # Provisioned, the Stripe task only runs once the creating transaction commits
+    stripe_account_id = Faker("bothify", text="acct_test################")
+    stripe_customer_id = Faker("bothify", text="cus_test################")
+    stripe_status = "ready"
 
     @post_generation
     def password(self, create: bool, extracted: Sequence[Any], **kwargs):
@@ -7,3 +7,16 @@ pytestmark = pytest.mark.django_db
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.username}/"
+
+
+def test_signup_provisions_stripe_after_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks:
+        user = User.objects.create_user("newuser", "new@domain.com", "password")
+    assert user.stripe_status == User.StripeStatus.PENDING
+
+    for callback in callbacks:
+        callback()
+
+    user.refresh_from_db()
+    assert user.stripe_status == User.StripeStatus.READY
+    assert user.stripe_customer_id
@@ -0,0 +1,89 @@
+import time
+import uuid
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from mentors.users.api.serializers import UserSerializer
+from mentors.users.models import User
+from mentors.users.profiles import get_profile, profiles
+from mentors.utils.replica import reading_from_replica
+from mentors.utils.tiered_cache import TieredCache
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tiered_cache():
+    # Its own channel, so other tests' invalidations don't reach it
+    return TieredCache(f"test-{uuid.uuid4()}", max_size=2)
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_local_hits_skip_the_shared_cache(tiered_cache: TieredCache, monkeypatch):
+    assert tiered_cache.get(1, lambda: "one") == "one"
+    assert tiered_cache.get(1, lambda: "other") == "one"
+
+    monkeypatch.setattr(cache, "get", None)
+    assert tiered_cache.get(1, lambda: "other") == "one"
+    assert tiered_cache.stats() == {"misses": 1, "l1_hits": 2, "size": 1}
+
+
+def test_least_recently_used_entry_is_dropped(tiered_cache: TieredCache):
+    for key in [1, 2, 1, 3]:
+        tiered_cache.get(key, lambda: key)
+
+    assert list(tiered_cache.entries) == [1, 3]
+    # 2 is still in the shared cache
+    assert tiered_cache.get(2, lambda: "reloaded") == 2
+
+
+def test_invalidation_reaches_other_processes(tiered_cache: TieredCache):
+    other_worker = TieredCache(tiered_cache.namespace)
+    for worker in [tiered_cache, other_worker]:
+        worker.get(1, lambda: "old")
+        assert worker.subscribed.wait(2)
+
+    tiered_cache.invalidate([1])
+
+    wait_for(lambda: 1 not in other_worker.entries)
+    assert other_worker.get(1, lambda: "new") == "new"
+
+
+def test_value_loaded_across_an_invalidation_is_not_kept(tiered_cache: TieredCache):
+    def load_old_rows():
+        # The write commits while the old rows are being read
+        tiered_cache.publish_invalidation([1])
+        return "old"
+
+    assert tiered_cache.get(1, load_old_rows) == "old"
+
+    assert tiered_cache.get(1, lambda: "new") == "new"
+
+
+def test_profiles_read_from_the_replica_are_not_cached(user: User):
+    token = reading_from_replica.set(True)
+    try:
+        assert get_profile(user.pk, lambda: user)["username"] == user.username
+    finally:
+        reading_from_replica.reset(token)
+
+    assert not profiles.cached_locally(user.pk)
+    assert cache.get(profiles.shared_key(user.pk)) is None
+
+
+def test_mentor_changes_reach_the_serializer(user: User, rf: RequestFactory):
+    context = {"request": rf.get("/fake-url/")}
+    assert UserSerializer(user, context=context).data["is_mentor"] is False
+
+    user.mentor.approved = True
+    user.mentor.save()
+
+    assert UserSerializer(User.objects.get(pk=user.pk), context=context).data["is_mentor"] is True
@@ -1,12 +1,29 @@
 import pytest
 from celery.result import EagerResult
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import DatabaseError, transaction
 
-from mentors.users.tasks import get_users_count
+from mentors.users.models import User
+from mentors.users.tasks import get_users_count, provision_stripe, send_mail_batch
 from mentors.users.tests.factories import UserFactory
+from mentors.utils.mail import queue_mail
+from mentors.utils.stripe_stub import StripeStub
 
 pytestmark = pytest.mark.django_db
 
 
+class FlakyEmailBackend(EmailBackend):
+    """Fails once, on the second message it is asked to send."""
+    failed = False
+
+    def send_messages(self, messages):
+        if len(mail.outbox) == 1 and not FlakyEmailBackend.failed:
+            FlakyEmailBackend.failed = True
+            raise ConnectionError("Mail provider timed out")
+        return super().send_messages(messages)
+
+
 def test_user_count(settings):
     """A basic test to execute the get_users_count Celery task."""
     UserFactory.create_batch(3)
@@ -14,3 +31,96 @@ def test_user_count(settings):
     task_result = get_users_count.delay()
     assert isinstance(task_result, EagerResult)
     assert task_result.result == 3
+
+
+@pytest.fixture
+def sent_batches(settings, monkeypatch):
+    """The subjects of each batch handed to the mail task."""
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    batches = []
+    delay = send_mail_batch.delay
+
+    def record(batch):
+        batches.append([mail["subject"] for mail in batch])
+        return delay(batch)
+
+    monkeypatch.setattr(send_mail_batch, "delay", record)
+    return batches
+
+
+def test_queue_mail_sends_batch_on_commit(sent_batches, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_mail("First", "Hello", "you@local.test", ["a@domain.com"])
+        queue_mail("Second", "Text", "you@local.test", ["b@domain.com"], html_message="<p>Html</p>")
+        assert mail.outbox == []
+
+    assert sent_batches == [["First", "Second"]]
+    assert [message.subject for message in mail.outbox] == ["First", "Second"]
+    assert mail.outbox[1].alternatives == [("<p>Html</p>", "text/html")]
+
+
+def test_queue_mail_drops_mail_of_rolled_back_savepoints(sent_batches, django_capture_on_commit_callbacks):
+    def queue_and_roll_back(subject):
+        with pytest.raises(DatabaseError):
+            with transaction.atomic():
+                queue_mail(subject, "Hello", "you@local.test", ["a@domain.com"])
+                raise DatabaseError
+
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_and_roll_back("Rolled back")
+    assert sent_batches == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_mail("Before", "Hello", "you@local.test", ["a@domain.com"])
+        queue_and_roll_back("Rolled back")
+        queue_mail("After", "Hello", "you@local.test", ["a@domain.com"])
+
+    assert sent_batches == [["Before", "After"]]
+    assert [message.subject for message in mail.outbox] == ["Before", "After"]
+
+    # The flush hook registered in the rolled back savepoint went with it
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_and_roll_back("Rolled back")
+        queue_mail("Kept", "Hello", "you@local.test", ["a@domain.com"])
+
+    assert sent_batches == [["Before", "After"], ["Kept"]]
+
+
+def test_send_mail_batch_retries_unsent_messages(settings, monkeypatch):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    settings.EMAIL_BACKEND = "mentors.users.tests.test_tasks.FlakyEmailBackend"
+    monkeypatch.setattr(FlakyEmailBackend, "failed", False)
+    batch = [
+        {"subject": subject, "body": "", "from_email": "you@local.test", "to": ["a@domain.com"]}
+        for subject in ["First", "Second", "Third"]
+    ]
+
+    send_mail_batch.delay(batch)
+
+    assert FlakyEmailBackend.failed
+    assert [message.subject for message in mail.outbox] == ["First", "Second", "Third"]
+
+
+def test_provision_stripe_is_idempotent(stripe_stub: StripeStub):
+    user = UserFactory(stripe_account_id="", stripe_customer_id="", stripe_status=User.StripeStatus.PENDING)
+
+    provision_stripe.delay(user.pk)
+    provision_stripe.delay(user.pk)
+
+    user.refresh_from_db()
+    assert user.stripe_status == User.StripeStatus.READY
+    assert user.stripe_account_id.startswith("acct_")
+    assert user.stripe_customer_id.startswith("cus_")
+    assert stripe_stub.requests == [("POST", "accounts"), ("POST", "customers")]
+
+
+def test_provision_stripe_retries_with_the_same_key(stripe_stub: StripeStub):
+    user = UserFactory(stripe_account_id="", stripe_customer_id="", stripe_status=User.StripeStatus.PENDING)
+    stripe_stub.failures = 2
+
+    provision_stripe.delay(user.pk)
+
+    user.refresh_from_db()
+    assert user.stripe_status == User.StripeStatus.READY
+    assert len(stripe_stub.requests) == 4
+    assert len(stripe_stub.objects) == 2
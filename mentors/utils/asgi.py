@@ -0,0 +1,63 @@
+"""
+Django 3.2's ASGI handler iterates streaming responses synchronously, in the event loop, so a
+stream waiting on anything blocks every other request of the worker. This one iterates the
+responses that implement __aiter__ with async for, and stops them when the client disconnects.
+"""
+import asyncio
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+# The receive channel of the request being handled, for noticing the client disconnecting
+receive_channel = ContextVar("receive_channel")
+
+
+class AsyncStreamingASGIHandler(ASGIHandler):
+    async def __call__(self, scope, receive, send):
+        token = receive_channel.set(receive)
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            receive_channel.reset(token)
+
+    async def send_response(self, response, send):
+        if not hasattr(response, "__aiter__"):
+            return await super().send_response(response, send)
+
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers(response)})
+        stream = asyncio.ensure_future(self.send_stream(response, send))
+        disconnect = asyncio.ensure_future(wait_for_disconnect(receive_channel.get()))
+        await asyncio.wait([stream, disconnect], return_when=asyncio.FIRST_COMPLETED)
+        for task in (stream, disconnect):
+            task.cancel()
+        await asyncio.gather(stream, disconnect, return_exceptions=True)
+        if not stream.cancelled() and stream.exception() is not None:
+            raise stream.exception()
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    @staticmethod
+    async def send_stream(response, send):
+        async for part in response:
+            await send({"type": "http.response.body", "body": response.make_bytes(part), "more_body": True})
+
+
+async def wait_for_disconnect(receive):
+    # The request body has been read, nothing else is sent before the disconnect
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def headers(response):
+    """The response's headers and cookies, encoded like ASGIHandler.send_response() does."""
+    response_headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode("ascii")
+        if isinstance(value, str):
+            value = value.encode("latin1")
+        response_headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        response_headers.append((b"Set-Cookie", cookie.output(header="").encode("ascii").strip()))
+    return response_headers
@@ -0,0 +1,72 @@
+"""
+DRF's APIView can't run coroutines, so async views are plain Django views wrapped with
+async_api_view. They get a DRF request, authenticated like any API view, and return DRF
+Responses, which are rendered as JSON.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from rest_framework import exceptions, status
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def render(response):
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = JSONRenderer.media_type
+    response.renderer_context = {}
+    return response.render()
+
+
+def authenticate(request):
+    """Raises what APIView would for a request IsAuthenticated rejects."""
+    if not request.user.is_authenticated:
+        if request.authenticators and not request.successful_authenticator:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied()
+
+
+def error_response(request, exc):
+    response = Response({"detail": exc.detail}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        header = request.authenticators[0].authenticate_header(request)
+        if header:
+            response["WWW-Authenticate"] = header
+        else:
+            response.status_code = status.HTTP_403_FORBIDDEN
+    return response
+
+
+def async_api_view(http_method_names):
+    """
+    Makes an async view behave like an APIView limited to http_method_names, with the default
+    authentication classes and IsAuthenticated. Async views can't run in ATOMIC_REQUESTS's
+    transaction, so they open their own where they need one.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapped_view(request, *args, **kwargs):
+            drf_request = Request(
+                request,
+                parsers=[JSONParser(), FormParser(), MultiPartParser()],
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            try:
+                if request.method not in http_method_names:
+                    raise exceptions.MethodNotAllowed(request.method)
+                # Authenticators query the database
+                await sync_to_async(authenticate)(drf_request)
+            except exceptions.APIException as exc:
+                return render(error_response(drf_request, exc))
+            return render(await view(drf_request, *args, **kwargs))
+
+        # csrf_exempt's wrapper isn't a coroutine function, so mark the view directly. Like
+        # APIView, SessionAuthentication still enforces CSRF for session-authenticated requests.
+        wrapped_view.csrf_exempt = True
+        return transaction.non_atomic_requests(wrapped_view)
+
+    return decorator
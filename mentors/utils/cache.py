@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# How long callers that miss wait for the lock holder's value before fetching it themselves
+MISS_WAIT = 0.5  # seconds
+
+
+def lock_key(key):
+    return f"{key}:lock"
+
+
+def store(key, value, ttl, stale_ttl):
+    """Caches value as fresh for ttl seconds, then servable as stale for another stale_ttl."""
+    cache.set(key, {"value": value, "fresh_until": time.time() + ttl}, timeout=ttl + stale_ttl)
+
+
+def get_or_fetch(
+    key, fetch, ttl, stale_ttl, revalidate=None, lock_timeout=10, miss_wait=MISS_WAIT, poll_interval=0.05
+):
+    """
+    Returns the cached value for key, with at most one caller at a time refreshing it across
+    every process sharing the cache (single-flight, the lock is taken with cache.add).
+
+    A stale value is returned right away while the caller holding the lock refreshes it. With
+    revalidate, the refresh happens in the background: revalidate must fetch, store() the value
+    and delete lock_key(key). Without it, the lock holder calls fetch() itself. On a miss the
+    other callers wait up to miss_wait for the value to appear, then fetch it themselves. When
+    the cache is down (add() returns None with IGNORE_EXCEPTIONS) every caller fetches right away.
+    """
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry["value"]
+
+    locked = cache.add(lock_key(key), True, timeout=lock_timeout)
+    if locked:
+        if entry is not None and revalidate is not None:
+            try:
+                revalidate()
+            except Exception:
+                logger.exception("Could not schedule a refresh of %s", key)
+                cache.delete(lock_key(key))
+            return entry["value"]
+        try:
+            value = fetch()
+            store(key, value, ttl, stale_ttl)
+        finally:
+            cache.delete(lock_key(key))
+        return value
+
+    if entry is not None:
+        # Someone else is refreshing it
+        return entry["value"]
+    if locked is False:
+        entry = wait_for_entry(key, miss_wait, poll_interval)
+        if entry is not None:
+            return entry["value"]
+    return fetch()
+
+
+def wait_for_entry(key, timeout, poll_interval=0.05):
+    """Polls for the entry of key that another caller is storing, returns None after timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+async def aget_or_fetch(
+    key, fetch, ttl, stale_ttl, revalidate=None, lock_timeout=10, miss_wait=MISS_WAIT, poll_interval=0.05
+):
+    """get_or_fetch for async views, fetch is a coroutine function."""
+    entry = await sync_to_async(cache.get)(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry["value"]
+
+    locked = await sync_to_async(cache.add)(lock_key(key), True, timeout=lock_timeout)
+    if locked:
+        if entry is not None and revalidate is not None:
+            try:
+                await sync_to_async(revalidate)()
+            except Exception:
+                logger.exception("Could not schedule a refresh of %s", key)
+                await sync_to_async(cache.delete)(lock_key(key))
+            return entry["value"]
+        try:
+            value = await fetch()
+            await sync_to_async(store)(key, value, ttl, stale_ttl)
+        finally:
+            await sync_to_async(cache.delete)(lock_key(key))
+        return value
+
+    if entry is not None:
+        # Someone else is refreshing it
+        return entry["value"]
+    if locked is False:
+        deadline = time.monotonic() + miss_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            entry = await sync_to_async(cache.get)(key)
+            if entry is not None:
+                return entry["value"]
+    return await fetch()
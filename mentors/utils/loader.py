@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+
+class Loader:
+    """
+    An identity map of model instances for one request. attach() sets a relation on a whole page
+    of instances at once: the related rows nobody has loaded yet are fetched together, one
+    IN (...) query per model, and a row is only loaded once however many serializers follow it.
+
+    querysets maps each model the loader handles to the queryset its rows are loaded with.
+    Relations cached on the instances it holds are added to the map as well.
+    """
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+        self.instances = defaultdict(dict)
+
+    def add(self, *instances):
+        for instance in instances:
+            model = type(instance)
+            if instance.pk in self.instances[model]:
+                continue
+            self.instances[model][instance.pk] = instance
+            for field in model._meta.get_fields():
+                if (
+                    (field.many_to_one or field.one_to_one)
+                    and field.related_model in self.querysets
+                    and field.is_cached(instance)
+                    and field.get_cached_value(instance) is not None
+                ):
+                    self.add(field.get_cached_value(instance))
+
+    def attach(self, instances, name):
+        """Sets the relation name (a foreign key or a reverse one-to-one) on every instance."""
+        instances = list(instances)
+        if not instances:
+            return
+        field = type(instances[0])._meta.get_field(name)
+        model = field.related_model
+        for instance in instances:
+            if field.is_cached(instance) and field.get_cached_value(instance) is not None:
+                self.add(field.get_cached_value(instance))
+
+        if field.concrete:
+            # The instances hold the related primary key
+            def key(instance):
+                return getattr(instance, field.attname)
+
+            def index(related):
+                return related.pk
+            lookup = "pk__in"
+        else:
+            # Reverse one-to-one, the related rows hold the instances' primary key
+            def key(instance):
+                return instance.pk
+
+            def index(related):
+                return getattr(related, field.field.attname)
+            lookup = f"{field.field.attname}__in"
+
+        loaded = {index(related): related for related in self.instances[model].values()}
+        missing = {key(instance) for instance in instances if not field.is_cached(instance)} - loaded.keys()
+        missing.discard(None)
+        if missing:
+            for related in self.querysets[model].filter(**{lookup: missing}):
+                self.add(related)
+                loaded[index(related)] = related
+
+        for instance in instances:
+            if not field.is_cached(instance):
+                field.set_cached_value(instance, loaded.get(key(instance)))
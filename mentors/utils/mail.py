@@ -0,0 +1,97 @@
+import threading
+import weakref
+
+from django.core.mail import EmailMultiAlternatives
+from django.db import connection, transaction
+
+from config import celery_app
+
+MAIL_QUEUE = "mail"
+
+_local = threading.local()
+
+
+def queue_mail(subject, message, from_email, recipient_list, html_message=None):
+    """
+    Sends an email from a Celery worker once the current transaction commits, so requests
+    don't wait on the mail provider and nothing is sent for a transaction that rolls back.
+    Messages queued in the same transaction are handed to the worker as one batch.
+    """
+    mail = {"subject": subject, "body": message, "from_email": from_email, "to": list(recipient_list)}
+    if html_message:
+        mail["html"] = html_message
+
+    if not connection.in_atomic_block:
+        _send([mail])
+        return
+    # One hook per message, so Django drops the messages queued in a savepoint that rolls back.
+    # The transaction's flush hook sends the messages whose hooks it still has.
+    queued = _QueuedMail(mail)
+    transaction.on_commit(queued)
+    _flush_hook().queued.append(weakref.ref(queued))
+
+
+class _QueuedMail:
+    """
+    The commit hook of a queued message. Only Django's list of commit hooks references it, so
+    it is gone once a rollback drops it. Running it does nothing, the flush hook sends it.
+    """
+
+    __slots__ = ["mail", "__weakref__"]
+
+    def __init__(self, mail):
+        self.mail = mail
+
+    def __call__(self):
+        pass
+
+
+class _FlushHook:
+    """Sends the queued messages of a transaction that commits as one batch."""
+
+    __slots__ = ["queued", "ran", "__weakref__"]
+
+    def __init__(self):
+        self.queued = []
+        self.ran = False
+
+    def __call__(self):
+        self.ran = True
+        batch = [queued.mail for queued in (ref() for ref in self.queued) if queued is not None]
+        if batch:
+            _send(batch)
+
+
+def _flush_hook():
+    """
+    The current transaction's flush hook. A hook that was dropped with a rollback, or has run,
+    belongs to a finished transaction or savepoint, so a new one is registered.
+    """
+    flush_hook = getattr(_local, "flush_hook", lambda: None)()
+    if flush_hook is None or flush_hook.ran:
+        flush_hook = _FlushHook()
+        transaction.on_commit(flush_hook)
+        _local.flush_hook = weakref.ref(flush_hook)
+    return flush_hook
+
+
+def _send(batch):
+    # Imported here, users.models queues mail and is loaded before the tasks can be
+    from mentors.users.tasks import send_mail_batch
+
+    send_mail_batch.delay(batch)
+
+
+def build_message(mail, connection=None):
+    message = EmailMultiAlternatives(
+        mail["subject"], mail["body"], mail["from_email"], mail["to"], connection=connection
+    )
+    if "html" in mail:
+        message.attach_alternative(mail["html"], "text/html")
+    return message
+
+
+def mail_queue_depth():
+    """Number of mail batches waiting in the broker for a worker."""
+    with celery_app.connection_for_read() as conn:
+        return conn.default_channel.queue_declare(queue=MAIL_QUEUE, passive=True).message_count
@@ -0,0 +1,89 @@
+"""
+Sends the reads of selected API views to a read replica, configured with DATABASE_REPLICA_URL.
+Views opt in with ReplicaReadMixin. A user who just wrote something reads from the primary for
+REPLICA_STICKY_SECONDS afterwards, so they see their own changes before the replica catches up.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA = "replica"
+ROUTER = "mentors.utils.replica.ReplicaRouter"
+
+# Set while a view that reads from the replica is running
+reading_from_replica = ContextVar("reading_from_replica", default=False)
+
+
+def replica_configured():
+    return ROUTER in settings.DATABASE_ROUTERS
+
+
+def sticky_key(user_id):
+    return f"db-primary:{user_id}"
+
+
+def pin_to_primary(user):
+    cache.set(sticky_key(user.pk), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def pinned_to_primary(user):
+    return user.is_authenticated and cache.get(sticky_key(user.pk)) is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return REPLICA if reading_from_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaReadMixin:
+    """
+    Reads of safe requests go to the replica, for every action or only those listed in
+    replica_actions.
+    """
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            replica_configured()
+            and request.method in SAFE_METHODS
+            and (self.replica_actions is None or self.action in self.replica_actions)
+            and not pinned_to_primary(request.user)
+        ):
+            self.replica_token = reading_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Serializers have run by now, only rendering is left
+        token = getattr(self, "replica_token", None)
+        if token is not None:
+            reading_from_replica.reset(token)
+            self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class PinWritersToPrimaryMiddleware(MiddlewareMixin):
+    """Pins users to the primary after a successful write request."""
+
+    def process_response(self, request, response):
+        # DRF sets request.user once it has authenticated the request
+        if (
+            replica_configured()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return response
@@ -0,0 +1,121 @@
+"""
+Caches the rendered JSON of API views that serve the same data to everyone. Entries carry the
+version of their namespace, and invalidate() moves the namespace to a new version when the
+underlying rows change. An entry of an older version, or past its TTL, is stale: one request
+renders it again while the others keep serving the stale copy. On a miss the others wait for
+the copy it renders.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from mentors.utils.cache import lock_key, store, wait_for_entry
+from mentors.utils.replica import reading_from_replica
+
+RESPONSE_CACHE_TTL = 10 * 60  # seconds
+RESPONSE_CACHE_STALE_TTL = 10 * 60
+# How long other requests serve the stale copy if the one rendering it never finishes
+RESPONSE_RENDER_TIMEOUT = 30
+# How long requests that miss wait for another request's rendering before rendering it themselves
+RESPONSE_RENDER_WAIT = 0.5
+
+
+def version_key(namespace):
+    return f"responses:{namespace}:version"
+
+
+def current_version(namespace):
+    # A timestamp rather than a counter, so a version evicted from the cache is never reused
+    return cache.get_or_set(version_key(namespace), time.time_ns(), timeout=None)
+
+
+def bump_version(namespace):
+    cache.set(version_key(namespace), time.time_ns(), timeout=None)
+
+
+def invalidate(namespace):
+    """
+    Drops the namespace's cached responses now and again once the current transaction commits,
+    so a response rendered from the old rows in between isn't served either.
+    """
+    bump_version(namespace)
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+class CachedResponseMixin:
+    """
+    Serves the JSON rendering of the response_cache_actions from the cache, skipping the
+    queryset and the serializer. The browsable API and error responses are not cached.
+    """
+    response_cache_namespace = None
+    response_cache_actions = ("list", "retrieve")
+
+    def get_response_cache_variant(self, request):
+        """Anything besides the URL the response depends on."""
+        return ""
+
+    def response_cache_key(self, request):
+        variant = ":".join(
+            [request.accepted_media_type, request.build_absolute_uri(), str(self.get_response_cache_variant(request))]
+        )
+        digest = hashlib.sha256(variant.encode()).hexdigest()
+        return f"responses:{self.response_cache_namespace}:{digest}"
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.response_cache_actions or not isinstance(request.accepted_renderer, JSONRenderer):
+            return handler(request, *args, **kwargs)
+
+        key = self.response_cache_key(request)
+        version = current_version(self.response_cache_namespace)
+        entry = cache.get(key)
+        if entry is not None and entry["value"]["version"] == version and entry["fresh_until"] > time.time():
+            return self.cached_http_response(entry["value"])
+        # Single-flight, the request that takes the lock renders while the others serve the stale copy.
+        # On a miss they wait for the copy it renders instead, rendering it themselves if none shows up.
+        # add() returns None when the cache is down, then there is nobody to wait for.
+        locked = cache.add(lock_key(key), True, timeout=RESPONSE_RENDER_TIMEOUT)
+        if locked is False:
+            if entry is None:
+                entry = wait_for_entry(key, RESPONSE_RENDER_WAIT)
+            if entry is not None:
+                return self.cached_http_response(entry["value"])
+
+        def release():
+            if locked:
+                cache.delete(lock_key(key))
+
+        # Rendered from the primary, a lagging replica could still return the rows from before the
+        # version was bumped and they would be stored as the new version
+        token = reading_from_replica.set(False)
+        try:
+            response = handler(request, *args, **kwargs)
+        except Exception:
+            release()
+            raise
+        finally:
+            reading_from_replica.reset(token)
+        if response.status_code != 200:
+            release()
+            return response
+
+        def cache_rendered(rendered):
+            value = {"version": version, "content": rendered.content, "content_type": rendered["Content-Type"]}
+            store(key, value, RESPONSE_CACHE_TTL, RESPONSE_CACHE_STALE_TTL)
+            release()
+
+        response.add_post_render_callback(cache_rendered)
+        return response
+
+    @staticmethod
+    def cached_http_response(value):
+        return HttpResponse(value["content"], content_type=value["content_type"])
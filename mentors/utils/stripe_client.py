@@ -0,0 +1,260 @@
+"""
+The HTTP client every Stripe API call goes through, views and Celery tasks alike. It keeps a
+pool of keep-alive connections per process, applies connect/read timeouts to each call, stops
+calling Stripe for a while after repeated failures and records call latencies per API method.
+configure() installs it from the users app's ready().
+
+Async views call request() instead of the stripe library, which only does blocking I/O. The
+call is encoded and its response interpreted by the library, only the round trip is async.
+"""
+import asyncio
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from stripe.api_requestor import APIRequestor, _api_encode, _build_api_url
+
+# Path segments that are object ids, so e.g. every customer retrieve shares one histogram
+OBJECT_ID = re.compile(r"^[a-z]{2,}_[A-Za-z0-9_]{8,}$")
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures, so calls fail fast instead of waiting
+    on timeouts. After reset_timeout seconds one trial call is let through; it closes the
+    breaker again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let this call through as the trial, the others keep failing fast until it's done
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds, upper bounds
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def snapshot(self):
+        """Cumulative bucket counts, in the Prometheus histogram layout."""
+        buckets = {}
+        total = 0
+        for bound, count in zip([*map(str, self.BUCKETS), "+Inf"], self.counts):
+            total += count
+            buckets[bound] = total
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class StripeHTTPClient(stripe.http_client.RequestsClient):
+    name = "mentors"
+
+    def __init__(self, timeout, pool_size, failure_threshold, reset_timeout):
+        # One session shared by every thread, so connections are pooled per process
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        super().__init__(timeout=timeout, session=session)
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = defaultdict(LatencyHistogram)
+        self.latency_lock = threading.Lock()
+        # httpx connections belong to the event loop they were opened in. Only kept where the
+        # loop lives as long as the process, see share_async_sessions().
+        self.share_async_sessions = False
+        self.async_sessions = weakref.WeakKeyDictionary()
+        self.ssl_context = None
+
+    def request(self, method, url, headers, post_data=None):
+        self.check_circuit()
+        start = time.monotonic()
+        try:
+            response = super().request(method, url, headers, post_data)
+        except stripe.error.APIConnectionError:
+            self.record(method, url, start, None)
+            raise
+        self.record(method, url, start, response[1])
+        return response
+
+    async def request_async(self, method, url, headers, post_data=None):
+        self.check_circuit()
+        start = time.monotonic()
+        try:
+            async with self.async_session() as session:
+                response = await session.request(method.upper(), url, headers=headers, content=post_data)
+        except httpx.HTTPError as e:
+            self.record(method, url, start, None)
+            raise stripe.error.APIConnectionError(f"Error communicating with Stripe: {e!r}", should_retry=True) from e
+        self.record(method, url, start, response.status_code)
+        return response.content, response.status_code, response.headers
+
+    @asynccontextmanager
+    async def async_session(self):
+        """
+        The running loop's client. Async views under WSGI run each request in a new loop, so
+        unless the sessions are shared the client is closed after the call.
+        """
+        if not self.share_async_sessions:
+            async with self.build_async_session() as session:
+                yield session
+            return
+        loop = asyncio.get_running_loop()
+        session = self.async_sessions.get(loop)
+        if session is None:
+            session = self.async_sessions[loop] = self.build_async_session()
+        yield session
+
+    def build_async_session(self):
+        # Loading the CA certificates blocks the loop for a while, so clients built per call share them
+        if self.ssl_context is None:
+            self.ssl_context = httpx.create_ssl_context()
+        connect, read = self._timeout
+        return httpx.AsyncClient(
+            verify=self.ssl_context,
+            timeout=httpx.Timeout(read, connect=connect),
+            # Async views keep many more calls in flight than there are threads
+            limits=httpx.Limits(max_connections=self.pool_size * 10, max_keepalive_connections=self.pool_size),
+        )
+
+    def check_circuit(self):
+        if not self.breaker.allow():
+            raise stripe.error.APIConnectionError(
+                "Stripe calls are failing, not calling it again for a while.", should_retry=False
+            )
+
+    def record(self, method, url, start, status_code):
+        """Records a call's latency and outcome, status_code is None when it didn't get a response."""
+        self.observe(method, url, time.monotonic() - start)
+        if status_code is None or status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def observe(self, method, url, seconds):
+        segments = ["{id}" if OBJECT_ID.match(segment) else segment for segment in urlsplit(url).path.split("/")]
+        with self.latency_lock:
+            self.latency[f"{method.upper()} {'/'.join(segments)}"].observe(seconds)
+
+    def metrics(self):
+        with self.latency_lock:
+            latency = {label: histogram.snapshot() for label, histogram in sorted(self.latency.items())}
+        return {"circuit": self.breaker.state, "latency": latency}
+
+
+def build_http_client():
+    return StripeHTTPClient(
+        timeout=(settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT),
+        pool_size=settings.STRIPE_POOL_SIZE,
+        failure_threshold=settings.STRIPE_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.STRIPE_CIRCUIT_RESET_TIMEOUT,
+    )
+
+
+def configure():
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    stripe.api_base = settings.STRIPE_API_BASE
+    stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+    stripe.default_http_client = build_http_client()
+
+
+def share_async_sessions():
+    """
+    Keeps a pool of async connections per event loop, for servers whose loop lives as long as
+    the process. config.asgi calls it.
+    """
+    client = stripe.default_http_client
+    if isinstance(client, StripeHTTPClient):
+        client.share_async_sessions = True
+
+
+def metrics():
+    """This process's circuit breaker state and Stripe latency histograms."""
+    client = stripe.default_http_client
+    return client.metrics() if isinstance(client, StripeHTTPClient) else {}
+
+
+async def request(method, path, params=None, stripe_account=None, idempotency_key=None):
+    """
+    Calls the Stripe API without blocking the event loop, e.g.
+    await request("post", "/v1/account_links", {...}). Returns a StripeObject and raises the
+    library's errors, retrying like it does.
+    """
+    client = stripe.default_http_client
+    requestor = APIRequestor(account=stripe_account, client=client)
+    url = f"{requestor.api_base}{path}"
+    # Encoded like APIRequestor.request_raw does
+    encoded = urlencode(list(_api_encode(params or {}))).replace("%5B", "[").replace("%5D", "]")
+    post_data = None
+    if method == "post":
+        post_data = encoded
+    elif encoded:
+        url = _build_api_url(url, encoded)
+    headers = requestor.request_headers(stripe.api_key, method)
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
+
+    num_retries = 0
+    while True:
+        try:
+            response, connection_error = await client.request_async(method, url, headers, post_data), None
+        except stripe.error.APIConnectionError as e:
+            response, connection_error = None, e
+        if not client._should_retry(response, connection_error, num_retries):
+            break
+        num_retries += 1
+        await asyncio.sleep(client._sleep_time_seconds(num_retries, response))
+    if response is None:
+        raise connection_error
+
+    stripe_response = requestor.interpret_response(*response)
+    return stripe.util.convert_to_stripe_object(stripe_response, stripe.api_key, None, stripe_account)
@@ -0,0 +1,118 @@
+"""
+A local stand-in for the parts of the Stripe API the app uses, so flows that call Stripe can be
+tested and benchmarked offline. Point stripe.api_base (the STRIPE_API_BASE setting) at it.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Path after /v1/ -> (object name, id prefix) of the objects the stub can create
+CREATABLE = {
+    "accounts": ("account", "acct"),
+    "customers": ("customer", "cus"),
+    "account_links": ("account_link", None),
+    "checkout/sessions": ("checkout.session", "cs_test"),
+    "billing_portal/sessions": ("billing_portal.session", "bps"),
+}
+
+
+class StripeStubHandler(BaseHTTPRequestHandler):
+    server: "StripeStub"
+
+    def do_GET(self):
+        path = self.resource_path()
+        with self.server.lock:
+            self.server.requests.append(("GET", path))
+        if path == "balance":
+            return self.respond(200, {"object": "balance", "available": [], "pending": [], "livemode": False})
+        if path == "payouts":
+            return self.respond(200, {"object": "list", "data": [], "has_more": False, "url": "/v1/payouts"})
+        stored = self.server.objects.get(path.rsplit("/", 1)[-1])
+        if stored is None:
+            return self.respond(404, {"error": {"type": "invalid_request_error", "message": f"No such object: {path}"}})
+        self.respond(200, stored)
+
+    def do_POST(self):
+        path = self.resource_path()
+        length = int(self.headers.get("Content-Length") or 0)
+        params = dict(parse_qsl(self.rfile.read(length).decode()))
+        if path not in CREATABLE:
+            return self.respond(404, {"error": {"type": "invalid_request_error", "message": f"Unknown path: {path}"}})
+
+        idempotency_key = self.headers.get("Idempotency-Key")
+        with self.server.lock:
+            self.server.requests.append(("POST", path))
+            if self.server.failures:
+                self.server.failures -= 1
+                return self.respond(500, {"error": {"type": "api_error", "message": "Stub failure"}})
+            if idempotency_key and (path, idempotency_key) in self.server.idempotent:
+                return self.respond(200, self.server.idempotent[(path, idempotency_key)])
+            stored = self.server.create(path, params)
+            if idempotency_key:
+                self.server.idempotent[(path, idempotency_key)] = stored
+        self.respond(200, stored)
+
+    def resource_path(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        return urlsplit(self.path).path.removeprefix("/v1/").strip("/")
+
+    def respond(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StripeStub(ThreadingHTTPServer):
+    """
+    Keeps created objects in memory and honours Idempotency-Key like Stripe does. latency (in
+    seconds) is added to every request and the next `failures` writes answer with a 500.
+    """
+    daemon_threads = True
+    # Tests open many connections at once, socketserver only queues 5
+    request_queue_size = 64
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0, verbose=False):
+        super().__init__(address, StripeStubHandler)
+        self.latency = latency
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self):
+        self.objects = {}
+        self.idempotent = {}
+        self.requests = []
+        self.failures = 0
+
+    def create(self, path, params):
+        name, prefix = CREATABLE[path]
+        data = {"object": name, "livemode": False, "created": int(time.time()), **params}
+        if prefix:
+            data["id"] = f"{prefix}_{uuid.uuid4().hex[:24]}"
+            self.objects[data["id"]] = data
+        if path != "customers":
+            data["url"] = f"{self.url}/redirect/{uuid.uuid4().hex}"
+        if path == "checkout/sessions":
+            # Checkouts expire after 24 hours unless told otherwise
+            data["expires_at"] = int(params.get("expires_at") or data["created"] + 24 * 60 * 60)
+        return data
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
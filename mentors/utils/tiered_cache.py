@@ -0,0 +1,156 @@
+"""
+A two-tier cache for small, hot objects: a bounded LRU in each process (L1) in front of the
+shared cache (L2). Invalidations are published on Redis, and every process listening evicts
+its own copy. L1 entries also expire after a few seconds, which bounds how stale a process can
+get while it is disconnected from Redis.
+
+L2 entries carry the version of their key, which invalidation moves on, so a value loaded from
+the old rows and stored after the invalidation is ignored.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+RESUBSCRIBE_DELAY = 1  # seconds
+
+
+class TieredCache:
+    def __init__(self, namespace, max_size=1000, local_ttl=5, ttl=10 * 60):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = Counter()
+        # Bumped by every eviction, so a value read before one isn't stored after it
+        self.generation = 0
+        self.listener_pid = None
+        self.subscribed = threading.Event()
+        self.client = None
+
+    @property
+    def channel(self):
+        return f"tiered-cache:{self.namespace}:invalidate"
+
+    def shared_key(self, key):
+        return f"tiered-cache:{self.namespace}:{key}"
+
+    def version_key(self, key):
+        return f"tiered-cache:{self.namespace}:{key}:version"
+
+    def get(self, key, load, store=True):
+        """
+        Returns the value for key from L1, then L2, then load(). Pass store=False when load()
+        may read stale rows, the value is then returned without being cached.
+        """
+        self.listen()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.counters["l1_hits"] += 1
+                return entry[1]
+            generation = self.generation
+
+        shared_key, version_key = self.shared_key(key), self.version_key(key)
+        found = cache.get_many([shared_key, version_key])
+        # A timestamp rather than a counter, so a version that expired is never reused
+        version = found.get(version_key) or cache.get_or_set(version_key, time.time_ns(), self.ttl)
+        shared = found.get(shared_key)
+        if shared is not None and shared["version"] == version:
+            value = shared["value"]
+            counter = "l2_hits"
+        else:
+            value = load()
+            counter = "misses"
+            if store:
+                # Read before loading, so a value loaded before an invalidation isn't current after it
+                cache.set(shared_key, {"version": version, "value": value}, self.ttl)
+
+        with self.lock:
+            self.counters[counter] += 1
+            if store and generation == self.generation:
+                self.entries[key] = (time.monotonic() + self.local_ttl, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return value
+
+    def cached_locally(self, key):
+        """Whether get(key) would be served from this process, without counting it."""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def invalidate(self, keys):
+        """
+        Drops keys from every process now and again once the current transaction commits, so
+        a value loaded from the old rows in between isn't kept either.
+        """
+        keys = list(keys)
+        self.publish_invalidation(keys)
+        transaction.on_commit(lambda: self.publish_invalidation(keys))
+
+    def publish_invalidation(self, keys):
+        self.evict(keys)
+        version = time.time_ns()
+        cache.set_many({self.version_key(key): version for key in keys}, self.ttl)
+        try:
+            self.redis().publish(self.channel, json.dumps(keys))
+        except redis.RedisError:
+            logger.exception("Could not publish the invalidation of %s", self.namespace)
+
+    def evict(self, keys=None):
+        with self.lock:
+            self.generation += 1
+            if keys is None:
+                self.entries.clear()
+            for key in keys or ():
+                self.entries.pop(key, None)
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, "size": len(self.entries)}
+
+    def redis(self):
+        if self.client is None:
+            self.client = redis.Redis.from_url(settings.REDIS_URL)
+        return self.client
+
+    def listen(self):
+        """Starts the invalidation listener once per process, forked workers start their own."""
+        if self.listener_pid == os.getpid():
+            return
+        with self.lock:
+            if self.listener_pid == os.getpid():
+                return
+            self.listener_pid = os.getpid()
+            self.entries.clear()
+            self.subscribed.clear()
+        threading.Thread(target=self.run_listener, name=f"{self.namespace}-invalidation", daemon=True).start()
+
+    def run_listener(self):
+        while True:
+            try:
+                pubsub = self.redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.subscribed.set()
+                for message in pubsub.listen():
+                    self.evict(json.loads(message["data"]))
+            except redis.RedisError:
+                logger.warning("Lost the %s invalidation channel, resubscribing", self.namespace, exc_info=True)
+            # Invalidations may have been missed while disconnected
+            self.subscribed.clear()
+            self.evict()
+            time.sleep(RESUBSCRIBE_DELAY)
@@ -0,0 +1,24 @@
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+
+class AtomicWritesMixin:
+    """
+    Takes an API view out of ATOMIC_REQUESTS for safe requests, so reads (and the Stripe or
+    broker calls some of them make) don't hold a transaction open. Other requests are still
+    handled in one transaction, which DRF rolls back when it turns an exception into a response.
+
+    ATOMIC_REQUESTS can only be turned off per URL, and a viewset serves reads and writes from
+    the same URL, hence opening the write transaction in dispatch() instead.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return transaction.non_atomic_requests(super().as_view(*args, **kwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        # Inside a caller's transaction (e.g. in tests) a savepoint keeps DRF's rollback to this request
+        if request.method in SAFE_METHODS and not transaction.get_connection().in_atomic_block:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().dispatch(request, *args, **kwargs)
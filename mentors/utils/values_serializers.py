@@ -0,0 +1,75 @@
+"""
+Read-only serializers for list endpoints that render rows of queryset.values() instead of model
+instances, skipping ModelSerializer's per-field and per-instance work. Each one stands in for a
+ModelSerializer and must render exactly the same JSON.
+"""
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+# Formats datetimes the way ModelSerializer's DateTimeField does
+DATETIME_FIELD = serializers.DateTimeField()
+
+
+def datetime_representation(value):
+    return DATETIME_FIELD.to_representation(value)
+
+
+def file_url(name, model_field, context):
+    """What ModelSerializer's FileField or ImageField renders for a stored file name."""
+    if not name:
+        return None
+    url = model_field.storage.url(name)
+    request = context.get("request")
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class ValuesSerializer:
+    """Implement project() or set values, and to_representation(row)."""
+    values = ()
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.context = context or {}
+
+    @classmethod
+    def project(cls, queryset):
+        return queryset.values(*cls.values)
+
+    def prepare(self, rows):
+        """Loads what the rows need besides their own columns, once for the whole page."""
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+    @property
+    def data(self):
+        rows = list(self.instance)
+        self.prepare(rows)
+        return ReturnList([self.to_representation(row) for row in rows], serializer=self)
+
+
+class ValuesListMixin:
+    """
+    Lists with values_serializer_class for JSON clients, the browsable API keeps the model
+    serializer and its forms.
+    """
+    values_serializer_class = None
+    values_actions = ("list",)
+
+    def renders_values(self):
+        accepted_renderer = getattr(self.request, "accepted_renderer", None)
+        return self.action in self.values_actions and isinstance(accepted_renderer, JSONRenderer)
+
+    def get_serializer_class(self):
+        if self.renders_values():
+            return self.values_serializer_class
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.renders_values():
+            return self.values_serializer_class.project(queryset)
+        return queryset